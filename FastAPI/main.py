@@ -1,12 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import json_summury, requirements, json_ERD, json_API, recommendation, stats, task_generate, search_subject
+from routers import json_summury, requirements, json_ERD, json_API, recommendation, stats, task_generate, search_subject, pipeline
+from utils.llm_client import init_llm_client, close_llm_client
+from utils.project_info_client import project_info_client
+from utils.llm_cache import llm_cache
+from utils.stats_aggregator import stats_aggregator
+from utils.deadline import DeadlineMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 앱 전체에서 공유하는 OpenAI 클라이언트 (커넥션 풀 재사용)
+    init_llm_client()
+    yield
+    await close_llm_client()
+    await project_info_client.aclose()
+    llm_cache.close()
+    stats_aggregator.flush()
 
 app = FastAPI(
     title="FastAPI LLM Project",
     description="PJA_ProJect LLM 사용",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# 호출자가 보낸 마감 시간(X-Request-Deadline / X-Request-Timeout) 을 LLM 호출에 전달
+app.add_middleware(DeadlineMiddleware)
+
 # 헬스체크 엔드포인트 추가
 @app.get("/")
 async def root():
@@ -25,3 +45,4 @@ app.include_router(recommendation.router, prefix="/api/PJA", tags=["프로젝트
 app.include_router(stats.router, prefix="/api/PJA", tags=["대시보드용 통계 파이프라인"])
 app.include_router(task_generate.router, prefix="/api/PJA", tags=["카테고리&기능&액션 추천"])
 app.include_router(search_subject.router, prefix="/api/PJA", tags=["유사한 프로젝트 검색"])
+app.include_router(pipeline.router, prefix="/api/PJA", tags=["명세 생성 파이프라인"])
@@ -1,6 +1,6 @@
 # models/requests.py (기존 코드에 추가)
 from pydantic import BaseModel, Field , validator
-from typing import List, Optional, Any, Union, Dict
+from typing import List, Optional, Any, Union, Dict, Literal
 
 
 class Message(BaseModel):
@@ -14,6 +14,7 @@ class RequirementsRequest(BaseModel):
     max_tokens: Optional[int] = Field(4000, ge=1, le=8000, description="생성할 최대 토큰 개수")
     temperature: float = Field(0.3, ge=0.0, le=2.0, description="생성 창의성 정도")
     model: str = Field("gpt-4o-mini", description="사용할 모델 이름")
+    use_cache: bool = Field(True, description="같은 요청의 이전 생성 결과 재사용 여부 (False 면 새로 생성)")
 
 class SummuryRequest(BaseModel):
     project_overview: str = Field(..., description="사용자의 아이디어 작성 내용")
@@ -21,6 +22,7 @@ class SummuryRequest(BaseModel):
     max_tokens: Optional[int] = Field(4000, ge=1, le=4000, description="생성할 최대 토큰 개수")
     temperature: float = Field(0.3, ge=0.0, le=2.0, description="생성 창의성 정도")
     model: str = Field("gpt-4o-mini", description="사용할 모델 이름")
+    use_cache: bool = Field(True, description="같은 요청의 이전 생성 결과 재사용 여부 (False 면 새로 생성)")
 
 # ERD 전체
 class ERDRequest(BaseModel):
@@ -30,6 +32,7 @@ class ERDRequest(BaseModel):
     max_tokens: Optional[int] = Field(4000, ge=1, le=8000, description="생성할 최대 토큰 개수")
     temperature: float = Field(0.3, ge=0.0, le=2.0, description="생성 창의성 정도")
     model: str = Field("gpt-4o", description="사용할 모델 이름")
+    use_cache: bool = Field(True, description="같은 요청의 이전 생성 결과 재사용 여부 (False 면 새로 생성)")
 
 # API 전체
 class APIRequest(BaseModel):
@@ -39,6 +42,10 @@ class APIRequest(BaseModel):
     max_tokens: Optional[int] = Field(4000, ge=1, le=8000, description="생성할 최대 토큰 개수")
     temperature: float = Field(0.3, ge=0.0, le=2.0, description="생성 창의성 정도")
     model: str = Field("gpt-4o", description="사용할 모델 이름")
+    use_cache: bool = Field(True, description="같은 요청의 이전 생성 결과 재사용 여부 (False 면 새로 생성)")
+    sharded: bool = Field(False, description="태그별로 나누어 동시에 생성한 뒤 병합 (큰 프로젝트용)")
+    tags: Optional[List[str]] = Field(None, description="분할 생성에 사용할 태그 목록 (ERD 테이블명 등, 없으면 자동 도출)")
+    max_concurrency: int = Field(4, ge=1, le=16, description="분할 생성 시 동시에 생성할 태그 수")
 
 # 추천 내용
 class RecommendationRequest(BaseModel):
@@ -51,6 +58,9 @@ class RecommendationRequest(BaseModel):
 class DashboardRequest(BaseModel) :
     user_log : str = Field(..., description="전처리 데이터")
 
+class StatsEventsRequest(BaseModel):
+    events: List[Dict[str, Any]] = Field(..., description="새로 발생한 사용자 액션 이벤트 목록 (user_log 항목과 같은 형식)")
+
 # Category&Feature&Action 생성
 class TaskGenerateRequest(BaseModel):
     project_summary: str = Field(..., description="프로젝트 개요 정보 (JSON 또는 Python 딕셔너리 형식)")
@@ -59,4 +69,29 @@ class TaskGenerateRequest(BaseModel):
 class SearchshimilerRequest(BaseModel) :
     project_info : str = Field(..., description="유저의 project_info")
     top_k : int = 10
-    recommendation_threshold : int = 0.2
+    recommendation_threshold : float = 0.2
+    search_mode : Literal["exact", "ann"] = Field("exact", description="exact: 전체 후보 정확 계산 / ann: 근사 최근접 이웃으로 후보 축소")
+
+class SearchshimilerBatchRequest(BaseModel) :
+    project_info_list : List[str] = Field(..., description="유사 프로젝트를 계산할 project_info 목록")
+    top_k : int = 10
+    recommendation_threshold : float = 0.2
+    search_mode : Literal["exact", "ann"] = Field("exact", description="exact: 전체 후보 정확 계산 / ann: 근사 최근접 이웃으로 후보 축소")
+    exclude_self : bool = Field(True, description="결과에서 요청한 workspace 자신 제외 여부")
+
+# 유사도 검색 인덱스 증분 업데이트
+class SearchIndexUpsertRequest(BaseModel) :
+    project_info : str = Field(..., description="추가/수정할 workspace의 project_info")
+
+# 명세 생성 파이프라인 (요약 ∥ 요구사항 -> ERD ∥ API)
+class PipelineRequest(BaseModel):
+    project_overview: str = Field(..., description="사용자의 아이디어 작성 내용")
+    requirements: str = Field(..., description="기존 요구사항 목록")
+    additional_count: int = Field(5, ge=1, le=20, description="추가로 생성할 요구사항 개수")
+    temperature: float = Field(0.3, ge=0.0, le=2.0, description="생성 창의성 정도")
+    summary_model: str = Field("gpt-4o-mini", description="요약 생성 모델")
+    requirements_model: str = Field("gpt-4o-mini", description="요구사항 생성 모델")
+    erd_model: str = Field("gpt-4o", description="ERD 생성 모델")
+    api_model: str = Field("gpt-4o", description="API 명세 생성 모델")
+    api_sharded: bool = Field(False, description="API 명세를 ERD 테이블별로 나누어 동시에 생성 (ERD 단계 이후 실행)")
+    use_cache: bool = Field(True, description="같은 요청의 이전 생성 결과 재사용 여부 (False 면 새로 생성)")
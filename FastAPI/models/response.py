@@ -1,6 +1,6 @@
 # models/response.py (기존 코드에 추가)
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Literal
 
 class RequirementsResponse(BaseModel):
     requirements: List[dict] = Field(..., description="생성된 요구사항 목록")
@@ -42,9 +42,36 @@ class DashboardResponse(BaseModel) :
     task_imbalance : Dict[str, Any] = Field(..., description="작업 불균형 json_data")
     processing_time : Dict[str, Any] = Field(..., description="평균작업 처리 시간 json_data")
 
+class StatsIngestResponse(BaseModel):
+    applied: int = Field(..., description="통계에 반영된 이벤트 수")
+    ignored: int = Field(..., description="형식 오류이거나 이미 더 최신 상태가 있어 무시된 이벤트 수")
+    workspaces: List[int] = Field(..., description="통계가 바뀐 워크스페이스 ID 목록")
+
 class TaskGenerateResponse(BaseModel):
     generated_tasks : Dict[str, Any] = Field(..., description="생성된 category, feature, actions 초안 json")
 
+class TaskGenerateJobResponse(BaseModel):
+    job_id : str = Field(..., description="작업 ID")
+    status : Literal["queued", "running", "done", "failed"] = Field(..., description="작업 상태")
+    result : Optional[Dict[str, Any]] = Field(None, description="완료 시 생성된 category, feature, actions 초안 json")
+    error : Optional[str] = Field(None, description="실패 시 오류 내용")
+
 # 유사도 검색
 class SearchshimilerResponse(BaseModel) :
-    similer_ID : Dict[str, Any] = Field(..., description="project_index")
+    similer_ID : Dict[str, Any] = Field(..., description="project_index (project_ID, sim_score)")
+
+class SearchshimilerBatchResponse(BaseModel) :
+    similer_ID_list : List[Dict[str, Any]] = Field(..., description="요청 순서대로 workspace_ID, project_ID, sim_score")
+
+class SearchIndexResponse(BaseModel) :
+    indexed_count : int = Field(..., description="인덱스에 포함된 프로젝트 수")
+
+# 명세 생성 파이프라인
+class PipelineResponse(BaseModel):
+    summary : Dict[str, Any] = Field(..., description="프로젝트 요약 생성 결과 (SummuryResponse)")
+    requirements : Dict[str, Any] = Field(..., description="요구사항 생성 결과 (RequirementsResponse)")
+    erd : Dict[str, Any] = Field(..., description="ERD 생성 결과 (ERDResponse)")
+    api : Dict[str, Any] = Field(..., description="API 명세 생성 결과 (APIResponse)")
+    stages : Dict[str, Dict[str, Any]] = Field(..., description="단계별 시작 시각 / 소요 시간(ms) / 토큰 사용량")
+    total_elapsed_ms : float = Field(..., description="파이프라인 전체 소요 시간(ms)")
+    total_tokens : int = Field(..., description="전체 단계의 총 토큰 수")
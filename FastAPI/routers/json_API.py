@@ -1,21 +1,30 @@
 # json_ERDAPI.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 import openai
-import os
+import asyncio
+import logging
 from dotenv import load_dotenv
 from models.requests import APIRequest
 from models.response import APIResponse
 import json
-from utils.json_parsing import clean_and_parse_response, validate_json_structure
+from utils.json_parsing import clean_and_parse_response, validate_json_structure, API_SCHEMA
+from utils.json_stream import IncrementalJSONParser
+from utils.sse import sse_event, SSE_HEADERS
+from utils.llm_client import get_llm_client
+from utils.llm_call import chat_completion
+from utils.llm_cache import llm_cache, make_cache_key, cached_generate
 
 
 # 환경변수 로드
 load_dotenv()
 
+# 로거 설정
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-# OpenAI 클라이언트 초기화
-client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트는 앱 전체에서 공유 (main.py lifespan 에서 생성, Depends 로 주입)
 
 # 최적화된 시스템 프롬프트 (각 배열당 1개 객체만)
 # 백슬래시 완전 제거 최적화 시스템 프롬프트
@@ -70,8 +79,20 @@ OPTIMIZED_SYSTEM_PROMPT = """
 **중요: 응답은 반드시 순수한 JSON 형태로만 제공하세요.**
 """
 
-@router.post("/json_API/generate", response_model=APIResponse)
-async def generate_project_json(request: APIRequest):
+def build_api_messages(request: APIRequest, tag=None):
+  """generate / stream 공통 프롬프트 메시지 생성 (tag 를 주면 해당 태그의 API 만 생성하는 분할 생성용 프롬프트)"""
+  if tag is None:
+    scope_rules = """- 최소 15개 이상의 API 명세 작성
+  - 각 엔티티별 CRUD 작업 포함
+  - 인증, 파일처리, 통계, 알림 등 실무 API 포함"""
+    closing = "위 형식을 정확히 지켜서 프로젝트에 적합한 API를 최대한 많이 작성하세요!"
+  else:
+    # 분할 생성: 전체 개수 조건 없이 이 태그 범위의 API 만 작성
+    scope_rules = f"""- 태그 '{tag}' 에 해당하는 API 만 작성 (모든 API 의 tag 값은 '{tag}')
+  - 다른 태그의 API 는 작성하지 마세요
+  - 이 태그에 필요한 CRUD 및 기능 API 를 빠짐없이 작성"""
+    closing = f"위 형식을 정확히 지켜서 '{tag}' 태그에 필요한 API를 빠짐없이 작성하세요!"
+
   # 백슬래시 완전 제거 프롬프트
   enhanced_prompt = f"""
   프로젝트 데이터: {request.project_overview}
@@ -85,9 +106,7 @@ async def generate_project_json(request: APIRequest):
   - 특수문자 처리에도 백슬래시 사용 금지
 
   **API 생성 요구사항:**
-  - 최소 15개 이상의 API 명세 작성
-  - 각 엔티티별 CRUD 작업 포함
-  - 인증, 파일처리, 통계, 알림 등 실무 API 포함
+  {scope_rules}
   - http_method는 소문자로 작성
   - request 배열에는 1개 객체만
   - response 배열에는 1개 객체만  
@@ -185,18 +204,154 @@ async def generate_project_json(request: APIRequest):
   - 모든 example 값은 간단하고 명확하게 작성
   - JSON 문법 오류 절대 금지
 
-  위 형식을 정확히 지켜서 프로젝트에 적합한 API를 최대한 많이 작성하세요!
+  {closing}
   백슬래시가 포함된 응답은 절대 허용되지 않습니다!
   """
+  return [
+      {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
+      {"role": "user", "content": enhanced_prompt}
+  ]
+
+# 분할 생성 시 태그 목록 도출 설정
+API_TAG_MAX_TOKENS = 500
+API_MAX_TAGS = 12
+# 태그 하나의 최소 생성 토큰 (max_tokens 를 태그 수로 나눈 값이 이보다 작으면 이 값 사용)
+API_SHARD_MIN_TOKENS = 1000
+
+def shard_max_tokens(max_tokens, n_tags):
+  """요청 max_tokens 를 태그 수로 나눈 태그별 생성 토큰 (최소 API_SHARD_MIN_TOKENS, 최대 max_tokens)"""
+  if not max_tokens:
+    return max_tokens
+  return min(max_tokens, max(API_SHARD_MIN_TOKENS, -(-max_tokens // n_tags)))
+
+TAG_SYSTEM_PROMPT = """
+당신은 프로젝트 API 를 도메인별로 나누는 전문가입니다.
+프로젝트에 필요한 API 태그(엔티티 / 기능 단위) 목록을 작성하세요.
+
+**응답 형식:**
+{"tags": ["user", "auth", "project"]}
+
+**중요: 응답은 반드시 순수한 JSON 형태로만 제공하세요.**
+"""
+
+def build_tag_messages(request: APIRequest):
+  """분할 생성에 사용할 태그 목록 도출 프롬프트"""
+  prompt = f"""
+  프로젝트 데이터: {request.project_overview}
+  요구사항 데이터: {request.requirements}
+  프로젝트 요약 데이터: {request.project_summury}
+
+  - 태그는 영문 소문자 한 단어로 작성 (예: user, auth, project)
+  - 각 엔티티별 태그와 인증, 파일처리, 통계, 알림 등 기능 태그 포함
+  - 최대 {API_MAX_TAGS}개, 중복 없이 작성
+  """
+  return [
+      {"role": "system", "content": TAG_SYSTEM_PROMPT},
+      {"role": "user", "content": prompt}
+  ]
+
+def normalize_tags(tags, limit=None):
+  """앞뒤 공백 제거 + 대소문자 무시 중복 제거 (순서 유지), limit 를 주면 최대 limit 개"""
+  normalized = []
+  seen = set()
+  for tag in tags:
+    if not isinstance(tag, str) or not tag.strip():
+      continue
+    tag = tag.strip()
+    if tag.lower() in seen:
+      continue
+    seen.add(tag.lower())
+    normalized.append(tag)
+  return normalized[:limit] if limit else normalized
+
+async def derive_api_tags(request: APIRequest, client: openai.AsyncOpenAI):
+  """짧은 호출로 태그 목록 도출, (태그 목록, usage) 반환"""
+  response = await chat_completion(
+      client,
+      model=request.model,
+      messages=build_tag_messages(request),
+      max_tokens=API_TAG_MAX_TOKENS,
+      temperature=request.temperature,
+      response_format={"type": "json_object"}
+  )
+  json_data = clean_and_parse_response(response.choices[0].message.content, response_type="dict")
+  # 개수 제한은 LLM 이 도출한 태그에만 적용 (호출자가 준 태그는 모두 생성)
+  tags = normalize_tags(json_data.get("tags", []), limit=API_MAX_TAGS) if isinstance(json_data, dict) else []
+  if not tags:
+    raise HTTPException(status_code=500, detail="API 태그 목록 도출에 실패했습니다.")
+  return tags, response.usage
+
+def merge_api_specifications(shards):
+  """
+  태그별 결과를 순서대로 합치면서 path + http_method 가 같은 API 는 처음 것만 남김
+  path / http_method 가 문자열이 아닌 항목은 버린다 (한 태그의 잘못된 항목 때문에 전체를 실패시키지 않음)
+  """
+  merged = []
+  seen = set()
+  for specs in shards:
+    for spec in specs:
+      if not isinstance(spec, dict) or not isinstance(spec.get("path"), str) or not isinstance(spec.get("http_method"), str):
+        logger.warning(f"path / http_method 가 올바르지 않은 API 명세를 제외합니다: {str(spec)[:200]}")
+        continue
+      key = (spec["path"].rstrip("/") or "/", spec["http_method"].lower())
+      if key in seen:
+        continue
+      seen.add(key)
+      merged.append(spec)
+  return merged
+
+async def create_api_sharded(request: APIRequest, client: openai.AsyncOpenAI):
+  """
+  태그별 API 명세를 동시에 생성 후 병합 (소요 시간은 가장 긴 태그 기준, 한 번의 max_tokens 에 묶이지 않음)
+
+  - 태그: request.tags (ERD 테이블명 등) 가 있으면 전부 사용, 없으면 짧은 호출로 도출 (최대 API_MAX_TAGS 개)
+  - 동시 생성 수는 request.max_concurrency 로 제한
+  - request.max_tokens 는 태그 수로 나누어 태그별 생성에 사용 (shard_max_tokens)
+  - 한 태그라도 실패하면 어떤 태그가 실패했는지 포함하여 오류 반환 (남은 생성은 취소)
+  """
+  usages = []
+  tags = normalize_tags(request.tags or [])
+  if not tags:
+    tags, usage = await derive_api_tags(request, client)
+    usages.append(usage)
+
+  semaphore = asyncio.Semaphore(request.max_concurrency)
+  max_tokens = shard_max_tokens(request.max_tokens, len(tags))
+
+  async def create_shard(tag):
+    async with semaphore:
+      try:
+        return await create_api(request, client, build_api_messages(request, tag), max_tokens=max_tokens)
+      except HTTPException as e:
+        raise HTTPException(status_code=e.status_code, detail=f"'{tag}' 태그 생성 실패: {e.detail}", headers=e.headers)
 
+  tasks = [asyncio.ensure_future(create_shard(tag)) for tag in tags]
   try:
-      response = await client.chat.completions.create(
+    shards = await asyncio.gather(*tasks)
+  finally:
+    for task in tasks:
+      task.cancel()
+
+  json_data = {"apiSpecifications": merge_api_specifications(shard.json_data["apiSpecifications"] for shard in shards)}
+  if not validate_json_structure(json_data, schema=API_SCHEMA):
+    raise HTTPException(status_code=500, detail="병합된 결과물의 구조가 올바르지 않습니다")
+
+  usages = [usage for usage in usages if usage]
+  return APIResponse(
+      json=json_data,
+      model=request.model,
+      total_tokens=sum(usage.total_tokens for usage in usages) + sum(shard.total_tokens for shard in shards),
+      prompt_tokens=sum(usage.prompt_tokens for usage in usages) + sum(shard.prompt_tokens for shard in shards),
+      completion_tokens=sum(usage.completion_tokens for usage in usages) + sum(shard.completion_tokens for shard in shards)
+  )
+
+async def create_api(request: APIRequest, client: openai.AsyncOpenAI, messages, max_tokens=None):
+  try:
+      response = await chat_completion(
+          client,
           model=request.model,
-          messages=[
-              {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
-              {"role": "user", "content": enhanced_prompt}
-          ],
-          max_tokens=request.max_tokens,
+          messages=messages,
+          max_tokens=max_tokens or request.max_tokens,
           temperature=request.temperature
       )
       
@@ -209,7 +364,7 @@ async def generate_project_json(request: APIRequest):
           raise ValueError("생성된 결과물의 파싱에 실패했습니다.")
       
       # 구조 검증
-      if not validate_json_structure(json_data):
+      if not validate_json_structure(json_data, schema=API_SCHEMA):
           raise ValueError("생성된 결과물의 구조가 올바르지 않습니다")  
       
       # 토큰 사용량 정보
@@ -223,7 +378,95 @@ async def generate_project_json(request: APIRequest):
           completion_tokens=usage.completion_tokens if usage else 0
       )
       
+  except HTTPException:
+      raise
   except json.JSONDecodeError as e:
       raise HTTPException(status_code=500, detail=f"JSON 파싱 오류: {str(e)}\n응답: {content}")
   except Exception as e:
-      raise HTTPException(status_code=500, detail=f"json 오류: {str(e)}\n응답: {content}")
\ No newline at end of file
+      raise HTTPException(status_code=500, detail=f"json 오류: {str(e)}\n응답: {content}")
+
+@router.post("/json_API/generate", response_model=APIResponse)
+async def generate_project_json(request: APIRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+  messages = build_api_messages(request)
+  if request.sharded:
+    # 분할 생성 결과는 태그 목록까지 포함한 키로 따로 캐시
+    cache_key = make_cache_key(
+      messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature,
+      sharded=True, tags=normalize_tags(request.tags or [])
+    )
+    return await cached_generate(
+      cache_key, lambda: create_api_sharded(request, client), APIResponse, use_cache=request.use_cache
+    )
+  cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature)
+  return await cached_generate(
+    cache_key, lambda: create_api(request, client, messages), APIResponse, use_cache=request.use_cache
+  )
+
+# 스트리밍 시 완성되는 대로 내보낼 최상위 배열
+API_STREAM_KEYS = ("apiSpecifications",)
+
+async def stream_api_events(request: APIRequest, client: openai.AsyncOpenAI):
+  """
+  OpenAI 스트림을 받아 apiSpecifications 원소가 닫히는 즉시 element 이벤트로 전송
+  마지막에 전체 결과를 검증하여 APIResponse 와 같은 형태의 done 이벤트 전송
+  """
+  parser = IncrementalJSONParser(API_STREAM_KEYS)
+  usage = None
+  
+  messages = build_api_messages(request)
+  cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature)
+  
+  # 같은 요청의 검증된 결과가 캐시에 있으면 바로 done 이벤트 전송
+  if request.use_cache:
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+      yield sse_event("done", cached)
+      return
+  
+  try:
+      stream = await chat_completion(
+          client,
+          model=request.model,
+          messages=messages,
+          max_tokens=request.max_tokens,
+          temperature=request.temperature,
+          stream=True,
+          stream_options={"include_usage": True}
+      )
+      
+      async for chunk in stream:
+          if chunk.usage:
+              usage = chunk.usage
+          if not chunk.choices:
+              continue
+          for key, index, value in parser.feed(chunk.choices[0].delta.content):
+              yield sse_event("element", {"key": key, "index": index, "value": value})
+      
+      json_data = clean_and_parse_response(parser.text, response_type="dict")
+
+      if json_data is None :
+          raise ValueError("생성된 결과물의 파싱에 실패했습니다.")
+      
+      # 구조 검증
+      if not validate_json_structure(json_data, schema=API_SCHEMA):
+          raise ValueError("생성된 결과물의 구조가 올바르지 않습니다")
+      
+      result = APIResponse(
+          json=json_data,
+          model=request.model,
+          total_tokens=usage.total_tokens if usage else 0,
+          prompt_tokens=usage.prompt_tokens if usage else 0,
+          completion_tokens=usage.completion_tokens if usage else 0
+      )
+      done = result.model_dump(by_alias=True)
+      await llm_cache.set(cache_key, done)
+      yield sse_event("done", done)
+      
+  except HTTPException as e:
+      yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+  except Exception as e:
+      yield sse_event("error", {"detail": f"json 오류: {str(e)}\n응답: {parser.text}"})
+
+@router.post("/json_API/stream")
+async def stream_project_json(request: APIRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+  return StreamingResponse(stream_api_events(request, client), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,12 +1,17 @@
 # json_ERDAPI.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 import openai
-import os
 from dotenv import load_dotenv
 from models.requests import ERDRequest
 from models.response import ERDResponse
 import json
-from utils.json_parsing import clean_and_parse_response, validate_json_structure
+from utils.json_parsing import clean_and_parse_response, validate_json_structure, ERD_SCHEMA
+from utils.json_stream import IncrementalJSONParser
+from utils.sse import sse_event, SSE_HEADERS
+from utils.llm_client import get_llm_client
+from utils.llm_call import chat_completion
+from utils.llm_cache import llm_cache, make_cache_key, cached_generate
 
 
 # 환경변수 로드
@@ -14,8 +19,7 @@ load_dotenv()
 
 router = APIRouter()
 
-# OpenAI 클라이언트 초기화
-client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트는 앱 전체에서 공유 (main.py lifespan 에서 생성, Depends 로 주입)
 
 # 최적화된 시스템 프롬프트
 OPTIMIZED_SYSTEM_PROMPT = """
@@ -30,8 +34,8 @@ OPTIMIZED_SYSTEM_PROMPT = """
 **중요: 모든 관계의 테이블명과 외래키가 테이블 정의와 정확히 일치해야 합니다.**
 """
 
-@router.post("/json_ERD/generate", response_model=ERDResponse)
-async def generate_project_json(request: ERDRequest):   
+def build_erd_messages(request: ERDRequest):
+  """generate / stream 공통 프롬프트 메시지 생성"""
 # 개선된 프롬프트
   enhanced_prompt = f"""
   프로젝트: {request.project_overview}
@@ -64,14 +68,17 @@ async def generate_project_json(request: ERDRequest):
   4. 최소 5개 테이블, 백슬래시 금지, 순수 JSON만
   위 규칙을 지켜 완전한 ERD를 생성하세요!
   """
-  
+  return [
+      {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
+      {"role": "user", "content": enhanced_prompt}
+  ]
+
+async def create_erd(request: ERDRequest, client: openai.AsyncOpenAI, messages):
   try:
-      response = await client.chat.completions.create(
+      response = await chat_completion(
+          client,
           model=request.model,
-          messages=[
-              {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
-              {"role": "user", "content": enhanced_prompt}
-          ],
+          messages=messages,
           max_tokens=request.max_tokens,
           temperature=request.temperature
       )
@@ -85,7 +92,7 @@ async def generate_project_json(request: ERDRequest):
           raise ValueError("생성된 결과물의 파싱에 실패했습니다.")
       
       # 구조 검증
-      if not validate_json_structure(json_data):
+      if not validate_json_structure(json_data, schema=ERD_SCHEMA):
           raise ValueError("생성된 결과물의 구조가 올바르지 않습니다")    
       
       # 토큰 사용량 정보
@@ -99,7 +106,86 @@ async def generate_project_json(request: ERDRequest):
           completion_tokens=usage.completion_tokens if usage else 0
       )
       
+  except HTTPException:
+      raise
   except json.JSONDecodeError as e:
       raise HTTPException(status_code=500, detail=f"JSON 파싱 오류: {str(e)}")
   except Exception as e:
-      raise HTTPException(status_code=500, detail=f"json 오류: {str(e)}")
\ No newline at end of file
+      raise HTTPException(status_code=500, detail=f"json 오류: {str(e)}")
+
+@router.post("/json_ERD/generate", response_model=ERDResponse)
+async def generate_project_json(request: ERDRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+  messages = build_erd_messages(request)
+  cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature)
+  return await cached_generate(
+    cache_key, lambda: create_erd(request, client, messages), ERDResponse, use_cache=request.use_cache
+  )
+
+# 스트리밍 시 완성되는 대로 내보낼 최상위 배열
+ERD_STREAM_KEYS = ("erd_tables", "erd_relationships")
+
+async def stream_erd_events(request: ERDRequest, client: openai.AsyncOpenAI):
+  """
+  OpenAI 스트림을 받아 erd_tables / erd_relationships 원소가 닫히는 즉시 element 이벤트로 전송
+  마지막에 전체 결과를 검증하여 ERDResponse 와 같은 형태의 done 이벤트 전송
+  """
+  parser = IncrementalJSONParser(ERD_STREAM_KEYS)
+  usage = None
+  
+  messages = build_erd_messages(request)
+  cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature)
+  
+  # 같은 요청의 검증된 결과가 캐시에 있으면 바로 done 이벤트 전송
+  if request.use_cache:
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+      yield sse_event("done", cached)
+      return
+  
+  try:
+      stream = await chat_completion(
+          client,
+          model=request.model,
+          messages=messages,
+          max_tokens=request.max_tokens,
+          temperature=request.temperature,
+          stream=True,
+          stream_options={"include_usage": True}
+      )
+      
+      async for chunk in stream:
+          if chunk.usage:
+              usage = chunk.usage
+          if not chunk.choices:
+              continue
+          for key, index, value in parser.feed(chunk.choices[0].delta.content):
+              yield sse_event("element", {"key": key, "index": index, "value": value})
+      
+      json_data = clean_and_parse_response(parser.text, response_type="dict")
+
+      if json_data is None :
+          raise ValueError("생성된 결과물의 파싱에 실패했습니다.")
+      
+      # 구조 검증
+      if not validate_json_structure(json_data, schema=ERD_SCHEMA):
+          raise ValueError("생성된 결과물의 구조가 올바르지 않습니다")
+      
+      result = ERDResponse(
+          json=json_data,
+          model=request.model,
+          total_tokens=usage.total_tokens if usage else 0,
+          prompt_tokens=usage.prompt_tokens if usage else 0,
+          completion_tokens=usage.completion_tokens if usage else 0
+      )
+      done = result.model_dump(by_alias=True)
+      await llm_cache.set(cache_key, done)
+      yield sse_event("done", done)
+      
+  except HTTPException as e:
+      yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+  except Exception as e:
+      yield sse_event("error", {"detail": f"json 오류: {str(e)}"})
+
+@router.post("/json_ERD/stream")
+async def stream_project_json(request: ERDRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+  return StreamingResponse(stream_erd_events(request, client), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,20 +1,23 @@
 # routers/json_summury.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 import openai
-import os
 from dotenv import load_dotenv
 from models.requests import SummuryRequest
 from models.response import SummuryResponse
 import json
-from utils.json_parsing import clean_and_parse_response, validate_json_structure
+from utils.json_parsing import clean_and_parse_response, validate_json_structure, SUMMARY_SCHEMA
+from utils.sse import sse_event, SSE_HEADERS
+from utils.llm_client import get_llm_client
+from utils.llm_call import chat_completion
+from utils.llm_cache import llm_cache, make_cache_key, cached_generate
 
 # 환경변수 로드
 load_dotenv()
 
 router = APIRouter()
 
-# OpenAI 클라이언트 초기화
-client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트는 앱 전체에서 공유 (main.py lifespan 에서 생성, Depends 로 주입)
 
 # 개선된 시스템 프롬프트 - 내용 증강 버전
 OPTIMIZED_SYSTEM_PROMPT = """
@@ -69,8 +72,8 @@ OPTIMIZED_SYSTEM_PROMPT = """
 }
 """
 
-@router.post("/json_Summury/generate", response_model=SummuryResponse)
-async def generate_project_json(request: SummuryRequest):   
+def build_summary_messages(request: SummuryRequest):
+    """generate / stream 공통 프롬프트 메시지 생성"""
     # 내용 증강 중심의 사용자 프롬프트
     user_prompt = f"""
 다음은 사용자가 간략히 작성한 프로젝트 아이디어입니다:
@@ -106,14 +109,17 @@ async def generate_project_json(request: SummuryRequest):
 
 위에서 정의한 JSON 구조에 맞춰 전문적이고 구체적인 분석 결과를 제공해주세요.
 """
+    return [
+        {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
 
+async def create_summary(request: SummuryRequest, client: openai.AsyncOpenAI, messages):
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            client,
             model=request.model,
-            messages=[
-                {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=messages,
             max_tokens=request.max_tokens,
             temperature=request.temperature,
             response_format={"type": "json_object"}  # JSON 형식 강제
@@ -127,7 +133,7 @@ async def generate_project_json(request: SummuryRequest):
             raise ValueError("요구사항 파싱에 실패했습니다.")
         
         # 구조 검증
-        if not validate_json_structure(json_data):
+        if not validate_json_structure(json_data, schema=SUMMARY_SCHEMA):
             raise ValueError("생성된 요구사항의 구조가 올바르지 않습니다")    
       
         # 토큰 사용량 정보
@@ -141,7 +147,85 @@ async def generate_project_json(request: SummuryRequest):
             completion_tokens=usage.completion_tokens if usage else 0
         )
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"JSON 파싱 오류: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"처리 오류: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"처리 오류: {str(e)}")
+
+@router.post("/json_Summury/generate", response_model=SummuryResponse)
+async def generate_project_json(request: SummuryRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    messages = build_summary_messages(request)
+    cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature, response_format="json_object")
+    return await cached_generate(
+        cache_key, lambda: create_summary(request, client, messages), SummuryResponse, use_cache=request.use_cache
+    )
+
+async def stream_summary_events(request: SummuryRequest, client: openai.AsyncOpenAI):
+    """
+    OpenAI 스트림의 토큰을 delta 이벤트로 바로 전달하고
+    마지막에 전체 결과를 검증하여 SummuryResponse 와 같은 형태의 done 이벤트 전송
+    """
+    content = []
+    usage = None
+    
+    messages = build_summary_messages(request)
+    cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature, response_format="json_object")
+    
+    # 같은 요청의 검증된 결과가 캐시에 있으면 바로 done 이벤트 전송
+    if request.use_cache:
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            yield sse_event("done", cached)
+            return
+    
+    try:
+        stream = await chat_completion(
+            client,
+            model=request.model,
+            messages=messages,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            response_format={"type": "json_object"},  # JSON 형식 강제
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            content.append(delta)
+            yield sse_event("delta", {"content": delta})
+        
+        json_data = clean_and_parse_response("".join(content), response_type="dict")
+
+        if json_data is None:
+            raise ValueError("요구사항 파싱에 실패했습니다.")
+        
+        # 구조 검증
+        if not validate_json_structure(json_data, schema=SUMMARY_SCHEMA):
+            raise ValueError("생성된 요구사항의 구조가 올바르지 않습니다")
+        
+        result = SummuryResponse(
+            json=json_data,
+            model=request.model,
+            total_tokens=usage.total_tokens if usage else 0,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0
+        )
+        done = result.model_dump(by_alias=True)
+        await llm_cache.set(cache_key, done)
+        yield sse_event("done", done)
+        
+    except HTTPException as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"처리 오류: {str(e)}"})
+
+@router.post("/json_Summury/stream")
+async def stream_project_json(request: SummuryRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    return StreamingResponse(stream_summary_events(request, client), media_type="text/event-stream", headers=SSE_HEADERS)
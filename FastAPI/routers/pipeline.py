@@ -0,0 +1,140 @@
+# routers/pipeline.py
+import json
+import time
+import openai
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from models.requests import PipelineRequest, SummuryRequest, RequirementsRequest, ERDRequest, APIRequest
+from models.response import PipelineResponse
+from routers import json_summury, requirements, json_ERD, json_API
+from utils.dag import run_dag, StageError
+from utils.llm_client import get_llm_client
+from utils.sse import sse_event, SSE_HEADERS
+
+router = APIRouter()
+
+def build_pipeline_stages(request: PipelineRequest, client: openai.AsyncOpenAI):
+    """
+    명세 생성 단계와 실제 데이터 의존 관계
+
+    - summary, requirements: 사용자 입력만 사용 -> 동시에 실행
+    - erd, api: 생성된 요약 + 요구사항 사용 -> 두 단계가 끝나면 동시에 실행
+    - api_sharded 면 api 는 erd 단계 이후 ERD 테이블명을 태그로 사용해 태그별로 동시에 생성
+    각 단계는 기존 생성 엔드포인트 함수를 그대로 호출한다 (캐시 / 요청 병합 포함)
+    """
+
+    async def summary_stage(inputs):
+        result = await json_summury.generate_project_json(SummuryRequest(
+            project_overview=request.project_overview,
+            requirements=request.requirements,
+            temperature=request.temperature,
+            model=request.summary_model,
+            use_cache=request.use_cache
+        ), client)
+        # 유효하지 않은 아이디어면 요약 대신 error 메시지가 생성됨
+        if "error" in result.json_data:
+            raise HTTPException(status_code=400, detail=result.json_data["error"])
+        return result
+
+    async def requirements_stage(inputs):
+        return await requirements.generate_requirements(RequirementsRequest(
+            project_overview=request.project_overview,
+            existing_requirements=request.requirements,
+            additional_count=request.additional_count,
+            temperature=request.temperature,
+            model=request.requirements_model,
+            use_cache=request.use_cache
+        ), client)
+
+    def design_inputs(inputs):
+        """ERD / API 생성에 넘길 요구사항(기존 + 생성) 과 요약 문자열"""
+        generated = json.dumps(inputs["requirements"].requirements, ensure_ascii=False)
+        return {
+            "project_overview": request.project_overview,
+            "requirements": f"{request.requirements}\n{generated}",
+            "project_summury": json.dumps(inputs["summary"].json_data, ensure_ascii=False),
+            "temperature": request.temperature,
+            "use_cache": request.use_cache
+        }
+
+    async def erd_stage(inputs):
+        return await json_ERD.generate_project_json(ERDRequest(**design_inputs(inputs), model=request.erd_model), client)
+
+    async def api_stage(inputs):
+        if request.api_sharded:
+            tags = [table["name"] for table in inputs["erd"].json_data["erd_tables"]]
+            api_request = APIRequest(**design_inputs(inputs), model=request.api_model, sharded=True, tags=tags)
+        else:
+            api_request = APIRequest(**design_inputs(inputs), model=request.api_model)
+        return await json_API.generate_project_json(api_request, client)
+
+    api_deps = ("summary", "requirements", "erd") if request.api_sharded else ("summary", "requirements")
+    return {
+        "summary": ((), summary_stage),
+        "requirements": ((), requirements_stage),
+        "erd": (("summary", "requirements"), erd_stage),
+        "api": (api_deps, api_stage)
+    }
+
+def stage_report(result, timing):
+    """단계별 시간 정보 + 토큰 사용량"""
+    return {
+        **timing,
+        "model": result.model,
+        "total_tokens": result.total_tokens,
+        "prompt_tokens": result.prompt_tokens,
+        "completion_tokens": result.completion_tokens
+    }
+
+def stage_error(e: StageError):
+    """실패한 단계의 HTTPException 상태 코드 / 메시지를 유지하여 변환"""
+    status_code = getattr(e.error, "status_code", 500)
+    detail = getattr(e.error, "detail", None) or str(e.error)
+    return status_code, f"{e.stage} 단계 실패: {detail}"
+
+@router.post("/pipeline/generate", response_model=PipelineResponse)
+async def generate_pipeline(request: PipelineRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    """요약 → 요구사항 → ERD / API 명세를 한 번의 호출로 생성하는 엔드포인트 (독립 단계는 동시 실행)"""
+    start = time.perf_counter()
+    results = {}
+    stages = {}
+
+    try:
+        async for name, result, timing in run_dag(build_pipeline_stages(request, client)):
+            results[name] = result.model_dump(by_alias=True)
+            stages[name] = stage_report(result, timing)
+    except StageError as e:
+        status_code, detail = stage_error(e)
+        # 429 의 Retry-After 등 실패한 단계의 응답 헤더 유지
+        raise HTTPException(status_code=status_code, detail=detail, headers=getattr(e.error, "headers", None))
+
+    return PipelineResponse(
+        **results,
+        stages=stages,
+        total_elapsed_ms=round((time.perf_counter() - start) * 1000, 1),
+        total_tokens=sum(stage["total_tokens"] for stage in stages.values())
+    )
+
+async def stream_pipeline_events(request: PipelineRequest, client: openai.AsyncOpenAI):
+    """단계가 끝날 때마다 stage 이벤트 전송, 마지막에 단계별 시간 / 토큰 요약 done 이벤트 전송"""
+    start = time.perf_counter()
+    stages = {}
+
+    try:
+        async for name, result, timing in run_dag(build_pipeline_stages(request, client)):
+            stages[name] = stage_report(result, timing)
+            yield sse_event("stage", {"stage": name, **stages[name], "result": result.model_dump(by_alias=True)})
+
+        yield sse_event("done", {
+            "stages": stages,
+            "total_elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            "total_tokens": sum(stage["total_tokens"] for stage in stages.values())
+        })
+    except StageError as e:
+        status_code, detail = stage_error(e)
+        yield sse_event("error", {"stage": e.stage, "status_code": status_code, "detail": detail})
+
+@router.post("/pipeline/stream")
+async def stream_pipeline(request: PipelineRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    """파이프라인 단계 결과를 끝나는 순서대로 SSE 로 스트리밍하는 엔드포인트"""
+    return StreamingResponse(stream_pipeline_events(request, client), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,20 +1,22 @@
 # routers/recommendation.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 import openai
-import os
 from dotenv import load_dotenv
 from models.requests import RecommendationRequest
 from models.response import RecommendationResponse
 import json
 from datetime import datetime
+from utils.llm_client import get_llm_client
+from utils.llm_call import chat_completion
+from utils.llm_cache import make_cache_key
+from utils.singleflight import llm_singleflight
 
 # 환경변수 로드
 load_dotenv()
 
 router = APIRouter()
 
-# OpenAI 클라이언트 초기화
-client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트는 앱 전체에서 공유 (main.py lifespan 에서 생성, Depends 로 주입)
 
 # 프롬프트에 현재 날짜/시각 전달(startDate 기준날짜 설정 목적)
 NOW = datetime.now().isoformat()
@@ -71,7 +73,7 @@ OPTIMIZED_SYSTEM_PROMPT = """
 """.format(NOW=NOW)
 
 @router.post("/recommend/generate", response_model=RecommendationResponse)
-async def recommendation(request: RecommendationRequest):
+async def recommendation(request: RecommendationRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
     try:
         # 프롬프트 구성
         enhanced_prompt = f"""
@@ -83,16 +85,20 @@ async def recommendation(request: RecommendationRequest):
         2. 마지막 요소 뒤 쉼표 절대 금지        
         """
 
-        # OpenAI API 호출
-        response = await client.chat.completions.create(
+        messages = [
+            {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
+            {"role": "user", "content": enhanced_prompt}
+        ]
+        
+        # OpenAI API 호출 (동시에 들어온 같은 요청은 하나의 호출을 공유)
+        request_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=0.5)
+        response = await llm_singleflight.do(request_key, lambda: chat_completion(
+            client,
             model=request.model,
-            messages=[
-                {"role": "system", "content": OPTIMIZED_SYSTEM_PROMPT},
-                {"role": "user", "content": enhanced_prompt}
-            ],
+            messages=messages,
             max_tokens=request.max_tokens,
             temperature=0.5
-        )
+        ))
         
         # JSON 파싱
         content = response.choices[0].message.content
@@ -107,6 +113,8 @@ async def recommendation(request: RecommendationRequest):
             completion_tokens=response.usage.completion_tokens
         )
         
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"JSON 파싱 오류: {str(e)}")
     except Exception as e:
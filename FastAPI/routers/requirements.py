@@ -1,19 +1,23 @@
 # routers/requirements.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 import openai
-import os
 from dotenv import load_dotenv
 from models.requests import RequirementsRequest
 from models.response import RequirementsResponse
 import json
-from utils.json_parsing import clean_and_parse_response, validate_json_structure
+from utils.json_parsing import clean_and_parse_response, validate_json_structure, REQUIREMENTS_SCHEMA
+from utils.json_stream import IncrementalJSONParser
+from utils.sse import sse_event, SSE_HEADERS
+from utils.llm_client import get_llm_client
+from utils.llm_call import chat_completion
+from utils.llm_cache import llm_cache, make_cache_key, cached_generate
 
 # 환경변수 로드
 load_dotenv()
 router = APIRouter()
 
-# OpenAI 클라이언트 초기화
-client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 클라이언트는 앱 전체에서 공유 (main.py lifespan 에서 생성, Depends 로 주입)
 
 # 개선된 시스템 프롬프트
 ENHANCED_SYSTEM_PROMPT = """
@@ -58,9 +62,8 @@ PROJECT_ANALYSIS_PROMPT = """
 위 분석을 바탕으로 프로젝트의 특성에 맞는 요구사항을 생성하세요.
 """
 
-@router.post("/requirements/generate", response_model=RequirementsResponse)
-async def generate_requirements(request: RequirementsRequest):
-    """프로젝트 요구사항을 생성하는 엔드포인트"""
+def build_requirements_messages(request: RequirementsRequest):
+    """generate / stream 공통 프롬프트 메시지 생성"""
     
     # 1단계: 프로젝트 개요 분석 및 증강
     analysis_prompt = PROJECT_ANALYSIS_PROMPT.format(
@@ -108,14 +111,17 @@ async def generate_requirements(request: RequirementsRequest):
 - 기능 요구사항과 성능 요구사항을 적절히 조합
 - JSON 배열 형식 외의 어떤 텍스트도 포함하지 마세요
 """
+    return [
+        {"role": "system", "content": ENHANCED_SYSTEM_PROMPT},
+        {"role": "user", "content": requirements_prompt}
+    ]
 
+async def create_requirements(request: RequirementsRequest, client: openai.AsyncOpenAI, messages):
     try:
-        response = await client.chat.completions.create(
+        response = await chat_completion(
+            client,
             model=request.model,
-            messages=[
-                {"role": "system", "content": ENHANCED_SYSTEM_PROMPT},
-                {"role": "user", "content": requirements_prompt}
-            ],
+            messages=messages,
             max_tokens=request.max_tokens,
             temperature=request.temperature
         )
@@ -128,7 +134,7 @@ async def generate_requirements(request: RequirementsRequest):
             raise ValueError("요구사항 파싱에 실패했습니다.")
 
         # 구조 검증
-        if not validate_json_structure(requirements_data):
+        if not validate_json_structure(requirements_data, schema=REQUIREMENTS_SCHEMA):
             raise ValueError("생성된 요구사항의 구조가 올바르지 않습니다")
 
         # 요구사항 개수 검증
@@ -146,9 +152,94 @@ async def generate_requirements(request: RequirementsRequest):
             completion_tokens=usage.completion_tokens if usage else 0
         )
 
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"JSON 파싱 오류: {str(e)}")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"요구사항 생성 오류: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"요구사항 생성 오류: {str(e)}")
+
+@router.post("/requirements/generate", response_model=RequirementsResponse)
+async def generate_requirements(request: RequirementsRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    """프로젝트 요구사항을 생성하는 엔드포인트"""
+    
+    messages = build_requirements_messages(request)
+    cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature)
+    return await cached_generate(
+        cache_key, lambda: create_requirements(request, client, messages), RequirementsResponse, use_cache=request.use_cache
+    )
+
+async def stream_requirements_events(request: RequirementsRequest, client: openai.AsyncOpenAI):
+    """
+    OpenAI 스트림을 받아 요구사항 배열 원소가 닫히는 즉시 element 이벤트로 전송
+    마지막에 전체 결과를 검증하여 RequirementsResponse 와 같은 형태의 done 이벤트 전송
+    """
+    parser = IncrementalJSONParser()
+    usage = None
+    
+    messages = build_requirements_messages(request)
+    cache_key = make_cache_key(messages, model=request.model, max_tokens=request.max_tokens, temperature=request.temperature)
+    
+    # 같은 요청의 검증된 결과가 캐시에 있으면 바로 done 이벤트 전송
+    if request.use_cache:
+        cached = await llm_cache.get(cache_key)
+        if cached is not None:
+            yield sse_event("done", cached)
+            return
+    
+    try:
+        stream = await chat_completion(
+            client,
+            model=request.model,
+            messages=messages,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            for _, index, value in parser.feed(chunk.choices[0].delta.content):
+                yield sse_event("element", {"key": "requirements", "index": index, "value": value})
+        
+        requirements_data = clean_and_parse_response(parser.text, response_type="list")
+        
+        if requirements_data is None:
+            raise ValueError("요구사항 파싱에 실패했습니다.")
+
+        # 구조 검증
+        if not validate_json_structure(requirements_data, schema=REQUIREMENTS_SCHEMA):
+            raise ValueError("생성된 요구사항의 구조가 올바르지 않습니다")
+
+        # 요구사항 개수 검증
+        if len(requirements_data) != request.additional_count:
+            raise ValueError(f"요청된 {request.additional_count}개와 다른 {len(requirements_data)}개의 요구사항이 생성되었습니다")
+        
+        result = RequirementsResponse(
+            requirements=requirements_data,
+            model=request.model,
+            total_tokens=usage.total_tokens if usage else 0,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0
+        )
+        done = result.model_dump(by_alias=True)
+        await llm_cache.set(cache_key, done)
+        yield sse_event("done", done)
+
+    except HTTPException as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+    except ValueError as e:
+        yield sse_event("error", {"detail": str(e)})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"요구사항 생성 오류: {str(e)}"})
+
+@router.post("/requirements/stream")
+async def stream_requirements(request: RequirementsRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    """요구사항 생성 결과를 SSE 로 스트리밍하는 엔드포인트"""
+    return StreamingResponse(stream_requirements_events(request, client), media_type="text/event-stream", headers=SSE_HEADERS)
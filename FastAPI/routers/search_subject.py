@@ -1,15 +1,16 @@
 from fastapi import APIRouter, HTTPException
-import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+from models.requests import SearchshimilerRequest, SearchshimilerBatchRequest, SearchIndexUpsertRequest
+from models.response import SearchshimilerResponse, SearchshimilerBatchResponse, SearchIndexResponse
+from utils.search_index import SearchIndex, select_top_k
+from utils.project_info_client import project_info_client
+from utils.project_corpus import decode_project_info, parse_project_info
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from konlpy.tag import Okt
-import re
-from models.requests import SearchshimilerRequest
-from models.response import SearchshimilerResponse
-import json
-import ast
-import requests
+import asyncio
+import logging
+
+# 로거 설정
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -17,109 +18,187 @@ router = APIRouter()
 # DB에 이으는 과정 필요! (DB 연결 구역)
 ##################################################
 
-# 임시 데이터로 작성
-# project_info DB 연결필요
+# project_info 는 커넥션 풀 + TTL 캐시 클라이언트로 조회 (동시 요청은 fetch 하나를 공유)
 
+async def read_DB() :
+    data = await project_info_client.get()
 
+    # JSON 한 번만 디코딩하여 컬럼형 데이터(workspaceId, solutionIdea, 소문자 stack 토큰)로 변환
+    return decode_project_info(data)
+####################################################
 
-def read_DB() :
-    # url 접속
-    DB_url = 'http://13.125.204.95:8080/api/workspaces/project-info'
-    response = requests.get(url = DB_url)
-    data = response.json()['data']
+# 검색 인덱스 (최초 요청 시 디스크에서 로드, 없으면 DB로 생성 후 저장)
+search_index = None
+# 최초 로드를 한 번만 하기 위한 lock
+search_index_lock = asyncio.Lock()
+# 진행 중인 재생성 작업 (동시에 하나만 실행)
+rebuild_task = None
+# digest 비교 callback 을 등록한 project-info 갱신 task
+digest_check_task = None
 
-    # 방법 1: JSON string을 .json 확장자로 저장 (기본)
-    user_project_info = ast.literal_eval(data)
+async def get_search_index():
+    global search_index
+    if search_index is None:
+        async with search_index_lock:
+            if search_index is None:
+                index = await run_in_threadpool(SearchIndex.load)
+                if index is None:
+                    return await rebuild_search_index()
+                search_index = index
 
-    workspaceID_lst = []
-    solutionIdea_lst = []
-    stack_lst = []
+    # project-info 가 바뀌었으면 기존 인덱스로 응답하고 백그라운드에서 재생성
+    check_source_digest()
+    return search_index
 
-    for i in range(len(user_project_info)) :
-        workspaceID_lst.append(user_project_info[i]['workspaceId'])
-        solutionIdea_lst.append(user_project_info[i]['problemSolving']['solutionIdea'])
-        stack_lst.append(user_project_info[i]['technologyStack'])
+def check_source_digest():
+    """
+    project-info 변경 확인 (검색 요청은 네트워크를 기다리지 않음)
+    캐시가 만료되었으면 백그라운드 갱신만 시작하고, 갱신이 끝나면 digest 를 비교한다
+    갱신에 실패하면 (백엔드 장애 등) 기존 인덱스를 계속 사용
+    """
+    global digest_check_task
+    task = project_info_client.refresh_in_background()
+    if task is None:
+        schedule_rebuild_if_changed()
+    elif task is not digest_check_task:
+        digest_check_task = task
+        task.add_done_callback(_on_project_info_refreshed)
 
-    send_dataset = pd.DataFrame(index = workspaceID_lst, data = {
-        'subject': solutionIdea_lst,
-        'stack': stack_lst
-    })
+def _on_project_info_refreshed(task):
+    # 실패는 project_info_client 에서 로그
+    if not task.cancelled() and task.exception() is None:
+        schedule_rebuild_if_changed()
 
-    return send_dataset
-####################################################
+def schedule_rebuild_if_changed():
+    digest = project_info_client.digest
+    if search_index is not None and digest is not None and digest != search_index.source_digest:
+        schedule_rebuild()
+
+async def _rebuild():
+    """DB 전체로 TF-IDF 인덱스를 다시 fit 하고 디스크에 저장 (검색은 교체 전까지 기존 스냅샷 사용)"""
+    global search_index
+    dataset = await read_DB()
+    digest = project_info_client.digest
+
+    def build_and_save():
+        if search_index is None:
+            index = SearchIndex.build(dataset, source_digest=digest)
+        else:
+            index = search_index
+            index.rebuild(dataset, source_digest=digest)
+        index.save()
+        return index
 
-# 텍스트 전처리 함수
-def preprocess_text(text):
-    if pd.isna(text):
-        return ""
-    # HTML 태그 제거
-    text = re.sub('<.*?>', '', str(text))
-    # 특수문자 제거 (한글, 영문, 숫자, 공백만 유지)
-    text = re.sub('[^가-힣a-zA-Z0-9\s]', ' ', text)
-    # 연속된 공백을 하나로 변환
-    text = re.sub('\s+', ' ', text)
-    return text.strip()
-
-# TfidfVectorizer 진행
-vectorizer = TfidfVectorizer(
-    max_features=1000,  # 최대 특성 수
-    ngram_range=(1, 2),  # 1-gram과 2-gram 사용
-    min_df=1,  # 최소 문서 빈도
-    max_df=0.95,  # 최대 문서 빈도 (너무 자주 나오는 단어 제외)
-    stop_words=None
-)
+    search_index = await run_in_threadpool(build_and_save)
+    return search_index
+
+def schedule_rebuild():
+    """재생성 작업 시작 (이미 진행 중이면 그 작업을 반환)"""
+    global rebuild_task
+    if rebuild_task is None or rebuild_task.done():
+        rebuild_task = asyncio.ensure_future(_rebuild())
+        rebuild_task.add_done_callback(_log_rebuild_failure)
+    return rebuild_task
+
+def _log_rebuild_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"검색 인덱스 재생성 실패: {task.exception()}")
+
+async def rebuild_search_index(fresh = False):
+    """
+    진행 중인 재생성에 합류하여 결과 인덱스 반환 (없으면 새로 시작)
+    fresh=True 면 진행 중인 작업이 끝난 뒤 새로 읽은 DB 로 한 번 더 재생성한다
+    """
+    if fresh and rebuild_task is not None and not rebuild_task.done():
+        # 진행 중인 작업은 갱신 전 DB 로 시작했을 수 있으므로 끝나기를 기다린 뒤 다시 시작
+        await asyncio.wait({rebuild_task})
+    # 요청이 취소되어도 다른 요청이 기다리는 재생성 작업은 계속 진행
+    return await asyncio.shield(schedule_rebuild())
 
 class ProjectRecommender :
-    def __init__(self,  sample_df, vectorizer):
-        self.sample_df = sample_df
-        self.vectorizer = vectorizer
+    def __init__(self, search_index, search_mode = "exact"):
+        # 요청 처리 동안 사용할 불변 스냅샷 (재생성/증분 업데이트와 무관하게 일관된 상태)
+        self.snapshot = search_index.current
+        # ann 모드: ANN 인덱스로 후보를 줄인 뒤 정확한 점수 계산 (준비 전이면 exact)
+        self.ann = search_index.get_ann() if search_mode == "ann" else None
 
     def filter_stack_recomend_subjects(self, input_text, target_stack, recommendation_threshold, top_k = 10) :
-        # stack 관련 단어 데이터 소문자화 
-        target_stack = [item.lower() for item in target_stack]
-        self.sample_df['stack'] = self.sample_df['stack'].astype(str).str.lower().apply(ast.literal_eval)
+        # 같은 스택이 있는 후보만 유사도 계산 (stack 토큰 inverted index 사용)
+        candidate_ids, similarities = self.snapshot.score_candidates(input_text, target_stack, ann = self.ann)
+
+        # threshold 이상 중 상위 top_k 만 부분 정렬로 선택
+        top = select_top_k(similarities, recommendation_threshold, top_k)
 
-        # 벡터화 실행
-        tfidf_matrix = vectorizer.fit_transform(self.sample_df['processed_subject'])
+        return candidate_ids[top].tolist(), similarities[top].tolist()
 
-        # 사용자의 특정 개요의 유사도 기반 추천
-        processed_input = preprocess_text(input_text)
-        input_vector = vectorizer.transform([processed_input])
-        similarities = cosine_similarity(input_vector, tfidf_matrix).flatten()
-        self.sample_df['sim_score'] = similarities
+    def batch_filter_stack_recomend_subjects(self, queries, recommendation_threshold, top_k = 10, exclude_self = True) :
+        """queries: (workspaceId, input_text, target_stack) 리스트 -> 입력 순서대로 (ID 리스트, 점수 리스트)"""
+        scored = self.snapshot.score_candidates_batch(
+            [input_text for _, input_text, _ in queries],
+            [target_stack for _, _, target_stack in queries],
+            ann = self.ann
+        )
+
+        results = []
+        for (workspace_id, _, _), (candidate_ids, similarities) in zip(queries, scored):
+            # 자기 자신은 결과에서 제외
+            if exclude_self and workspace_id is not None:
+                similarities[candidate_ids == workspace_id] = -np.inf
 
-        # 같은 스택 있는지에 대한 필터
-        has_stack = self.sample_df[self.sample_df['stack'].apply(lambda x: bool(set(x) & set(target_stack)))]
-        has_stack_sort = has_stack.sort_values(by = 'sim_score', ascending= False)
-        has_stack_filter = has_stack_sort[has_stack_sort['sim_score'] > recommendation_threshold].head(top_k)
-        original_similar_indices = has_stack_filter.index.tolist()
+            top = select_top_k(similarities, recommendation_threshold, top_k)
+            results.append((candidate_ids[top].tolist(), similarities[top].tolist()))
 
-        return original_similar_indices
+        return results
 
 @router.post("/search_project/generate", response_model = SearchshimilerResponse)
 async def generate_search_project(request: SearchshimilerRequest):
     try :
-        # 데이터 준비
-        send_dataset = read_DB()
-
-        sample_df = send_dataset.copy()
-
-        # subject 컬럼 전처리
-        sample_df['processed_subject'] = sample_df['subject'].apply(preprocess_text)
-
-        # 추천 시스템 초기화
-        recommender = ProjectRecommender(sample_df, vectorizer)
+        # 추천 시스템 초기화 (미리 생성된 인덱스 사용)
+        recommender = ProjectRecommender(await get_search_index(), request.search_mode)
         
-        # 요청에서 데이터 추출
-        input_text = ast.literal_eval(request.project_info)['problemSolving']['solutionIdea']
-        target_stack = ast.literal_eval(request.project_info)['technologyStack']
+        # 요청에서 데이터 추출 (project_info 는 한 번만 디코딩)
+        _, input_text, target_stack = parse_project_info(request.project_info)
         top_k = request.top_k
         score = request.recommendation_threshold
 
-        recommend_id = recommender.filter_stack_recomend_subjects(input_text, target_stack, score, top_k)
+        recommend_id, sim_score = recommender.filter_stack_recomend_subjects(input_text, target_stack, score, top_k)
 
         return SearchshimilerResponse(
-            similer_ID = {"project_ID" : recommend_id})
+            similer_ID = {"project_ID" : recommend_id, "sim_score" : sim_score})
+
+    except KeyError as e:
+        # 키 오류 처리
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Missing required key in project_info: {str(e)}"
+        )
+
+    except Exception as e:
+        # 기타 오류 처리
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.post("/search_project/batch_generate", response_model = SearchshimilerBatchResponse)
+async def generate_search_project_batch(request: SearchshimilerBatchRequest):
+    """여러 workspace 의 유사 프로젝트를 한 번에 계산 (야간 일괄 재계산용)"""
+    try :
+        recommender = ProjectRecommender(await get_search_index(), request.search_mode)
+
+        # 요청에서 데이터 추출
+        queries = [parse_project_info(project_info) for project_info in request.project_info_list]
+
+        results = await run_in_threadpool(
+            recommender.batch_filter_stack_recomend_subjects,
+            queries, request.recommendation_threshold, request.top_k, request.exclude_self
+        )
+
+        return SearchshimilerBatchResponse(
+            similer_ID_list = [
+                {"workspace_ID" : workspace_id, "project_ID" : recommend_id, "sim_score" : sim_score}
+                for (workspace_id, _, _), (recommend_id, sim_score) in zip(queries, results)
+            ])
 
     except KeyError as e:
         # 키 오류 처리
@@ -133,4 +212,62 @@ async def generate_search_project(request: SearchshimilerRequest):
         raise HTTPException(
             status_code=500, 
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/search_project/index/rebuild", response_model = SearchIndexResponse)
+async def rebuild_search_project_index():
+    """DB 데이터로 검색 인덱스 재생성 (신규 workspace 반영용)"""
+    try :
+        project_info_client.invalidate()
+        index = await rebuild_search_index(fresh = True)
+        return SearchIndexResponse(indexed_count = len(index))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.put("/search_project/index/{workspace_id}", response_model = SearchIndexResponse)
+async def upsert_search_project_index(workspace_id: int, request: SearchIndexUpsertRequest):
+    """workspace 하나의 solutionIdea/technologyStack 을 인덱스에 추가 또는 수정"""
+    try :
+        _, input_text, stack = parse_project_info(request.project_info)
+        index = await get_search_index()
+
+        # 변경은 journal 에 한 줄 추가만 하고, 전체 저장은 compaction / 재생성 때 수행
+        await run_in_threadpool(index.upsert, workspace_id, input_text, stack)
+        return SearchIndexResponse(indexed_count = len(index))
+
+    except KeyError as e:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Missing required key in project_info: {str(e)}"
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.delete("/search_project/index/{workspace_id}", response_model = SearchIndexResponse)
+async def delete_search_project_index(workspace_id: int):
+    """workspace 하나를 인덱스에서 제거"""
+    try :
+        index = await get_search_index()
+        deleted = await run_in_threadpool(index.delete, workspace_id)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Internal server error: {str(e)}"
+        )
+
+    if not deleted:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"workspace_id not found in index: {workspace_id}"
+        )
+    return SearchIndexResponse(indexed_count = len(index))
@@ -1,9 +1,13 @@
 # routers/stats.py
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
-from models.requests import DashboardRequest
-from models.response import DashboardResponse
+from models.requests import DashboardRequest, StatsEventsRequest
+from models.response import DashboardResponse, StatsIngestResponse
+from utils.stats_aggregator import stats_aggregator
+from utils.stats_ingest import iter_ndjson, LatestActionColumns, NDJSONDecodeError
 import json
+import zlib
 
 router = APIRouter()
 
@@ -27,6 +31,36 @@ def pipeline_data(request: DashboardRequest):
         )
     )
 
+    return build_dashboard(latest_actions)
+
+@router.post("/stats/generate/ndjson", response_model=DashboardResponse)
+async def pipeline_data_ndjson(request: Request):
+    """
+    user_log 를 NDJSON (한 줄에 이벤트 1건, gzip 압축 가능) 본문으로 스트리밍 받아 통계 계산
+    본문을 받는 대로 (workspaceId, actionId) 별 최신 이벤트만 남기므로
+    전체 문자열 / 객체 트리 / 전체 DataFrame 을 동시에 메모리에 올리지 않는다
+    """
+    latest = LatestActionColumns()
+    gzipped = True if request.headers.get("content-encoding", "").lower() == "gzip" else None
+    try:
+        async for line_no, event in iter_ndjson(request.stream(), gzipped=gzipped):
+            latest.add(event, line_no)
+    except NDJSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"gzip 해제 오류: {str(e)}")
+
+    if not len(latest):
+        raise HTTPException(status_code=400, detail="이벤트가 없습니다.")
+    # 통계 계산은 CPU 작업이므로 이벤트 루프 밖에서 실행
+    return await run_in_threadpool(build_dashboard, latest.to_frame())
+
+def build_dashboard(latest_actions):
+    """
+    actionId 별 최신 이벤트 DataFrame 으로 통계 1 / 2 계산
+    (json 문자열 / NDJSON 스트림 어느 쪽으로 받아도 같은 계산을 사용)
+    """
+
     # stat 1/2 공통 작업 - participants 펼치기
     exploded = latest_actions.explode('details.participants')
     exploded['participants_userId'] = exploded['details.participants'].apply(lambda x: x.get('userId') if isinstance(x, dict) else None)
@@ -61,78 +95,30 @@ def pipeline_data(request: DashboardRequest):
     filtered['details.startDate'] = pd.to_datetime(filtered['details.startDate'])
     filtered['details.endDate'] = pd.to_datetime(filtered['details.endDate'])
 
-    # 모든 사용자 ID (이벤트 발생자 + 참여자)
-    all_user_ids = set(filtered['userId'].unique()) | set(filtered['participants_userId'].unique())
-
-    user_dfs = {}
-    for uid in all_user_ids:
-        # 해당 사용자가 발생시킨 이벤트 OR 참여한 이벤트
-        user_data = filtered[(filtered['userId'] == uid) | (filtered['participants_userId'] == uid)].copy()
-        user_dfs[f'df_{uid}'] = user_data
-
-
     # ===== Statistics 1 Start =====
 
     # state, importance 기준 grouping -> count 목적
     # 이벤트 발생자와 참여자 모두 집계
-    all_stat1_results = []
-
-    for uid, user_df in user_dfs.items():
-        # 현재 사용자 ID 추출 (df_123 -> 123)
-        current_user_id = int(uid.split('_')[1])
-        
-        # 해당 사용자와 관련된 모든 액션에 대해 처리
-        for _, row in user_df.iterrows():
-            action_id = row['details.actionId']
-            
-            # 이 사용자가 해당 액션에서 어떤 역할인지 판단
-            if row['userId'] == current_user_id:
-                # 발생자 역할
-                user_data = {
-                    'final_userId': current_user_id,
-                    'details.state': row['details.state'],
-                    'details.importance': row['details.importance'],
-                    'details.actionId': action_id,
-                    'role': 'initiator'
-                }
-                all_stat1_results.append(user_data)
-                
-            if row['participants_userId'] == current_user_id:
-                # 참여자 역할
-                user_data = {
-                    'final_userId': current_user_id,
-                    'details.state': row['details.state'],
-                    'details.importance': row['details.importance'],
-                    'details.actionId': action_id,
-                    'role': 'participant'
-                }
-                all_stat1_results.append(user_data)
-
-    # 모든 유저 데이터 합치기
-    if all_stat1_results:
-        combined_stats = pd.DataFrame(all_stat1_results)
-        
-        # 같은 사용자가 같은 액션에 여러 역할을 가질 경우 발생자 우선
-        dedup_stats = (
-            combined_stats
-            .sort_values('role')  # 'initiator'가 'participant'보다 앞에 옴
-            .drop_duplicates(
-                subset=['final_userId', 'details.actionId'], 
-                keep='first'
-            )
-        )
+    # 발생자 / 참여자 컬럼을 세로로 펼쳐 (사용자, 액션, 역할) 한 행씩 만든다 (발생자 행이 먼저 옴)
+    roles = filtered.melt(
+        id_vars=['details.actionId', 'details.state', 'details.importance'],
+        value_vars=['userId', 'participants_userId'],
+        var_name='role',
+        value_name='final_userId'
+    )
 
-        # 최종 집계
-        stat1_result = (
-            dedup_stats
-            .groupby(['final_userId', 'details.state', 'details.importance'])
-            .size()
-            .reset_index(name='count')
-            .rename(columns={'final_userId': 'userId'})
-            .to_dict(orient='records')
-        )
-    else:
-        stat1_result = []
+    # 같은 사용자가 같은 액션에 여러 역할을 가질 경우 발생자 우선
+    dedup_stats = roles.drop_duplicates(subset=['final_userId', 'details.actionId'], keep='first')
+
+    # 최종 집계
+    stat1_result = (
+        dedup_stats
+        .groupby(['final_userId', 'details.state', 'details.importance'])
+        .size()
+        .reset_index(name='count')
+        .rename(columns={'final_userId': 'userId'})
+        .to_dict(orient='records')
+    )
 
 
     # ===== Statistics 2 Start=====
@@ -198,4 +184,18 @@ def pipeline_data(request: DashboardRequest):
     return DashboardResponse(
         task_imbalance = {"data": stat1_result},
         processing_time = {"data": stat2_result}
-    )
\ No newline at end of file
+    )
+
+@router.post("/stats/events", response_model=StatsIngestResponse)
+def ingest_events(request: StatsEventsRequest):
+    """새로 발생한 이벤트만 받아 워크스페이스별 대시보드 통계를 갱신 (전체 로그 재전송 / 재계산 불필요)"""
+    applied, ignored, workspaces = stats_aggregator.ingest(request.events)
+    return StatsIngestResponse(applied=applied, ignored=ignored, workspaces=workspaces)
+
+@router.get("/stats/dashboard/{workspace_id}", response_model=DashboardResponse)
+def get_dashboard(workspace_id: int):
+    """지금까지 받은 이벤트 기준 대시보드 통계 (/stats/generate 와 같은 형식)"""
+    dashboard = stats_aggregator.dashboard(workspace_id)
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail="해당 워크스페이스의 이벤트가 없습니다.")
+    return DashboardResponse(**dashboard)
@@ -1,23 +1,39 @@
 # routers/task_generate.py
 from jinja2 import Template
-from openai import OpenAI
+import openai
 from dotenv import load_dotenv
 import json
 import os
 import ast
-from fastapi import APIRouter, HTTPException
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Depends
 from models.requests import TaskGenerateRequest
-from models.response import TaskGenerateResponse
+from models.response import TaskGenerateResponse, TaskGenerateJobResponse
+from utils.llm_client import get_llm_client
+from utils.llm_call import chat_completion
+from utils.rate_limiter import BATCH
+from utils.job_store import JobStore
+from utils.llm_cache import make_cache_key
+from utils.singleflight import llm_singleflight
 
-# OpenAI API Key 로드
+# 환경변수 로드
 load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=openai_api_key)
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# OpenAI 클라이언트는 앱 전체에서 공유 (Depends 로 주입)
 
 router = APIRouter()
 
+# 동시에 진행할 수 있는 작업 생성 수 (초과 요청은 대기)
+TASK_GENERATE_CONCURRENCY = int(os.getenv("TASK_GENERATE_CONCURRENCY", "8"))
+task_generate_semaphore = asyncio.Semaphore(TASK_GENERATE_CONCURRENCY)
+
+# 백그라운드 작업 모드 저장소
+task_jobs = JobStore()
+
 RCMD_PROMPT = """
 당신은 신입/초보 개발자 팀을 이끄는 시니어 테크 리드입니다.  
 다음은 한 프로젝트에 대한 주요 정보입니다.  
@@ -78,26 +94,42 @@ RCMD_PROMPT = """
 }
 """
 
-@router.post("/task_generate/generate", response_model=TaskGenerateResponse)
-def task_generate(request: TaskGenerateRequest):
+# 같은 요청 키의 OpenAI 호출을 기다리는 작업 목록 (request_key -> {"started", "jobs"})
+waiting_jobs = {}
+
+def join_waiting_jobs(request_key, job):
     """
-    프로젝트 정보를 바탕으로 카테고리, 기능, 액션을 생성하는 엔드포인트
+    같은 키의 호출을 기다리는 작업 목록에 job 을 등록
+    호출이 이미 동시 실행 자리를 얻었으면 바로 running, 아니면 자리를 얻을 때 함께 running 으로 바뀐다
+    """
+    waiting = waiting_jobs.setdefault(request_key, {"started": False, "jobs": []})
+    if job is not None:
+        if waiting["started"]:
+            job["status"] = "running"
+        else:
+            waiting["jobs"].append(job)
+    return waiting
+
+async def generate_tasks(request: TaskGenerateRequest, client: openai.AsyncOpenAI, job=None):
+    """
+    프로젝트 정보를 바탕으로 카테고리, 기능, 액션을 생성 (generate / jobs 공통)
+    OpenAI 호출은 TASK_GENERATE_CONCURRENCY 개까지만 동시에 진행
     """
     try:
-        print("=== 작업 생성 시작 ===")
+        logger.info("=== 작업 생성 시작 ===")
         
         # 1. 입력 데이터 파싱
         try:
             # JSON 형식 파싱 시도
             json_data = json.loads(request.project_summary)
-            print("JSON 형식으로 파싱 성공")
+            logger.debug("JSON 형식으로 파싱 성공")
         except json.JSONDecodeError:
             try:
                 # Python 딕셔너리 형식 파싱 시도
                 json_data = ast.literal_eval(request.project_summary)
-                print("Python 딕셔너리 형식으로 파싱 성공")
+                logger.debug("Python 딕셔너리 형식으로 파싱 성공")
             except (ValueError, SyntaxError) as e:
-                print(f"파싱 실패: {str(e)}")
+                logger.warning(f"파싱 실패: {str(e)}")
                 raise HTTPException(
                     status_code=422, 
                     detail=f"유효하지 않은 JSON 또는 딕셔너리 형식입니다: {str(e)}"
@@ -106,7 +138,7 @@ def task_generate(request: TaskGenerateRequest):
         # 2. 데이터 구조 정규화
         if isinstance(json_data, dict): 
             json_data = [json_data]
-            print("단일 객체를 리스트로 변환")
+            logger.debug("단일 객체를 리스트로 변환")
 
         # 3. 프로젝트 정보 추출
         def extract_project_summary(input_json):
@@ -134,73 +166,116 @@ def task_generate(request: TaskGenerateRequest):
         project_summary = extract_project_summary(json_data)
         
         if not project_summary:
-            print("프로젝트 정보 추출 실패")
+            logger.warning("프로젝트 정보 추출 실패")
             raise HTTPException(status_code=404, detail="프로젝트 정보를 찾을 수 없습니다.")
         
-        print("프로젝트 정보 추출 성공:")
-        print(json.dumps(project_summary, ensure_ascii=False, indent=2))
+        # 프로젝트 정보 전체는 debug 레벨에서만 출력
+        logger.info(f"프로젝트 정보 추출 성공 (workspace_id={project_summary['workspace_id']})")
+        logger.debug(json.dumps(project_summary, ensure_ascii=False, indent=2))
 
         # 4. 프롬프트 템플릿 렌더링
         try:
             template = Template(RCMD_PROMPT)
             rendered = template.render(input=json.dumps(project_summary, ensure_ascii=False, indent=2))
-            print("템플릿 렌더링 성공")
+            logger.debug("템플릿 렌더링 성공")
         except Exception as e:
-            print(f"템플릿 렌더링 실패: {str(e)}")
+            logger.warning(f"템플릿 렌더링 실패: {str(e)}")
             raise HTTPException(status_code=500, detail=f"템플릿 렌더링 오류: {str(e)}")
 
-        # 5. OpenAI API 호출 (최신 방식)
+        # 5. OpenAI API 호출 (비동기, 동시 실행 수 제한, 동시에 들어온 같은 요청은 하나의 호출을 공유)
         try:
-            print("OpenAI API 호출 시작...")
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "당신은 신입/초보 개발자 팀을 이끄는 시니어 테크 리드입니다. 주어진 정보를 바탕으로 해당 프로젝트를 성공적으로 구현하기 위한 작업 구조를 작성해야 합니다."
-                    },
-                    {
-                        "role": "user", 
-                        "content": rendered
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
+            messages = [
+                {
+                    "role": "system", 
+                    "content": "당신은 신입/초보 개발자 팀을 이끄는 시니어 테크 리드입니다. 주어진 정보를 바탕으로 해당 프로젝트를 성공적으로 구현하기 위한 작업 구조를 작성해야 합니다."
+                },
+                {
+                    "role": "user", 
+                    "content": rendered
+                }
+            ]
+            
+            request_key = make_cache_key(messages, model="gpt-4o-mini", temperature=0.3, max_tokens=4000)
+            waiting = join_waiting_jobs(request_key, job)
+
+            async def create_completion():
+                try:
+                    async with task_generate_semaphore:
+                        # 동시 실행 자리를 얻은 뒤에야 이 호출을 기다리는 작업 전체를 running 으로 표시
+                        waiting["started"] = True
+                        for waiting_job in waiting["jobs"]:
+                            waiting_job["status"] = "running"
+                        logger.info("OpenAI API 호출 시작...")
+                        return await chat_completion(
+                            client,
+                            priority=BATCH,
+                            model="gpt-4o-mini",
+                            messages=messages,
+                            temperature=0.3,
+                            max_tokens=4000
+                        )
+                finally:
+                    if waiting_jobs.get(request_key) is waiting:
+                        del waiting_jobs[request_key]
+
+            response = await llm_singleflight.do(request_key, create_completion)
             
             generated = response.choices[0].message.content.strip()
-            print("OpenAI API 응답 생성 성공")
-            print(f"응답 길이: {len(generated)} 문자")
+            logger.info(f"OpenAI API 응답 생성 성공 (응답 길이: {len(generated)} 문자)")
             
+        except HTTPException:
+            raise
         except Exception as e:
-            print(f"OpenAI API 호출 실패: {str(e)}")
+            logger.warning(f"OpenAI API 호출 실패: {str(e)}")
             raise HTTPException(status_code=500, detail=f"OpenAI API 호출 오류: {str(e)}")
 
         # 6. 응답 JSON 파싱
         try:
             generated_json = json.loads(generated)
-            print("LLM 응답 JSON 파싱 성공")
+            logger.debug("LLM 응답 JSON 파싱 성공")
         except json.JSONDecodeError as e:
-            print(f"LLM 응답 JSON 파싱 실패")
-            print(f"원본 응답: {generated[:500]}...")
+            logger.warning(f"LLM 응답 JSON 파싱 실패, 원본 응답: {generated[:500]}...")
             raise HTTPException(
                 status_code=500, 
                 detail=f"LLM 출력이 유효한 JSON 형식이 아닙니다: {str(e)}"
             )
 
         # 7. 응답 반환
-        print("=== 작업 생성 완료 ===")
-        return TaskGenerateResponse(generated_tasks=generated_json)
+        logger.info("=== 작업 생성 완료 ===")
+        return generated_json
         
     except HTTPException:
         # 이미 HTTPException인 경우 그대로 재발생
         raise
     except Exception as e:
         # 예상치 못한 오류
-        print(f"예상치 못한 오류 발생: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"예상치 못한 오류 발생: {str(e)}")
         raise HTTPException(
             status_code=500, 
             detail=f"서버 내부 오류가 발생했습니다: {str(e)}"
         )
+
+@router.post("/task_generate/generate", response_model=TaskGenerateResponse)
+async def task_generate(request: TaskGenerateRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    """
+    프로젝트 정보를 바탕으로 카테고리, 기능, 액션을 생성하는 엔드포인트
+    """
+    generated_json = await generate_tasks(request, client)
+    return TaskGenerateResponse(generated_tasks=generated_json)
+
+@router.post("/task_generate/jobs", response_model=TaskGenerateJobResponse, status_code=202)
+async def submit_task_generate_job(request: TaskGenerateRequest, client: openai.AsyncOpenAI = Depends(get_llm_client)):
+    """
+    작업 생성을 백그라운드로 시작하고 job_id 를 바로 반환하는 엔드포인트
+    결과는 GET /task_generate/jobs/{job_id} 로 조회
+    """
+    job_id = task_jobs.submit(generate_tasks, request, client)
+    return TaskGenerateJobResponse(**task_jobs.get(job_id))
+
+@router.get("/task_generate/jobs/{job_id}", response_model=TaskGenerateJobResponse)
+async def get_task_generate_job(job_id: str):
+    """백그라운드 작업 생성의 상태 / 결과 조회 엔드포인트"""
+    job = task_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return TaskGenerateJobResponse(**job)
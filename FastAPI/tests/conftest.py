@@ -0,0 +1,19 @@
+# tests/conftest.py
+import os
+import sys
+
+# FastAPI 폴더 기준 import (utils.*, routers.*) 를 저장소 루트에서 실행해도 사용할 수 있도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """time 모듈 대신 주입하는 가짜 시계 (monotonic 값을 테스트에서 직접 진행)"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
@@ -0,0 +1,106 @@
+# tests/test_llm_call.py
+import asyncio
+import json
+import time
+import httpx
+import openai
+import pytest
+import utils.llm_call as llm_call
+from utils.llm_call import chat_completion
+from utils.rate_limiter import RateLimiter
+
+MODEL = "gpt-4o-mini"
+MESSAGES = [{"role": "user", "content": "안녕하세요"}]
+
+
+def completion_body():
+    return json.dumps({
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": MODEL,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+    }).encode()
+
+
+class FakeOpenAI:
+    """첫 요청은 429 + retry-after, 이후는 200 + x-ratelimit-* 헤더로 응답하는 가짜 OpenAI 서버"""
+
+    def __init__(self, retry_after_ms=200):
+        self.retry_after_ms = retry_after_ms
+        self.sent_at = []
+
+    def handler(self, request):
+        self.sent_at.append(time.monotonic())
+        if len(self.sent_at) == 1:
+            return httpx.Response(
+                429,
+                json={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers={"retry-after-ms": str(self.retry_after_ms)}
+            )
+        return httpx.Response(200, content=completion_body(), headers={
+            "content-type": "application/json",
+            "x-ratelimit-limit-requests": "100",
+            "x-ratelimit-limit-tokens": "5000",
+            "x-ratelimit-remaining-requests": "42",
+            "x-ratelimit-remaining-tokens": "1234"
+        })
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    # 테스트마다 새 예산 + 짧은 백오프 (retry-after 대기가 지배하도록)
+    limiter = RateLimiter(limits={}, default_rpm=600, default_tpm=10**6)
+    monkeypatch.setattr(llm_call, "rate_limiter", limiter)
+    monkeypatch.setattr(llm_call, "LLM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(llm_call, "LLM_MAX_RETRIES", 2)
+    return limiter
+
+
+def make_client(server):
+    return openai.AsyncOpenAI(
+        api_key="test", base_url="http://openai.test/v1", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(server.handler))
+    )
+
+
+def test_429_pauses_budget_then_adapts_to_rate_limit_headers(limiter):
+    server = FakeOpenAI(retry_after_ms=200)
+
+    async def scenario():
+        client = make_client(server)
+        response = await chat_completion(client, model=MODEL, messages=MESSAGES, max_tokens=10)
+        await client.close()
+        return response
+
+    response = asyncio.run(scenario())
+    budget = limiter.budget(MODEL)
+
+    assert response.choices[0].message.content == "ok"
+    assert len(server.sent_at) == 2
+    # 429 의 retry-after 동안 다음 요청을 보내지 않음
+    assert budget.throttled == 1
+    assert budget.paused_until == pytest.approx(server.sent_at[0] + 0.2, abs=0.05)
+    assert server.sent_at[1] >= budget.paused_until
+    # 200 응답의 x-ratelimit-* 헤더로 한도 / 남은 예산 보정
+    assert (budget.rpm, budget.tpm) == (100, 5000)
+    # 남은 예산은 서버 값 이하로 낮춤 (요청 수는 429 로 이미 0 에서 다시 채워지는 중)
+    assert budget.requests <= 42
+    # 헤더 반영 후 경과 시간만큼은 다시 채워짐
+    assert budget.tokens == pytest.approx(1234, abs=50)
+
+
+def test_429_after_retries_becomes_http_429_with_retry_after(limiter, monkeypatch):
+    monkeypatch.setattr(llm_call, "LLM_MAX_RETRIES", 0)
+    server = FakeOpenAI(retry_after_ms=3000)
+
+    async def scenario():
+        client = make_client(server)
+        try:
+            await chat_completion(client, model=MODEL, messages=MESSAGES, max_tokens=10)
+        finally:
+            await client.close()
+
+    with pytest.raises(llm_call.HTTPException) as exc_info:
+        asyncio.run(scenario())
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) == 3
+    assert limiter.budget(MODEL).throttled == 1
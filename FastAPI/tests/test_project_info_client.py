@@ -0,0 +1,126 @@
+# tests/test_project_info_client.py
+import asyncio
+import json
+import httpx
+import pytest
+import utils.project_info_client as project_info_module
+from utils.project_info_client import ProjectInfoClient
+from conftest import FakeClock
+
+URL = "http://backend.test/api/workspaces/project-info"
+
+
+class FakeBackend:
+    """project-info API 흉내 - ETag 가 같으면 304, 요청 헤더를 기록"""
+
+    def __init__(self, data="v1", etag='"v1"'):
+        self.data = data
+        self.etag = etag
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        body = json.dumps({"data": self.data}).encode()
+        return httpx.Response(200, content=body, headers={"ETag": self.etag, "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(project_info_module, "time", clock)
+    return clock
+
+
+def make_client(backend):
+    return ProjectInfoClient(url=URL, ttl=60, stale_ttl=300, transport=httpx.MockTransport(backend.handler))
+
+
+def test_cached_within_ttl(clock):
+    backend = FakeBackend()
+
+    async def scenario():
+        client = make_client(backend)
+        assert await client.get() == "v1"
+        clock.advance(59)
+        assert await client.get() == "v1"
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(backend.requests) == 1
+
+
+def test_concurrent_cold_gets_share_one_fetch(clock):
+    backend = FakeBackend()
+
+    async def scenario():
+        client = make_client(backend)
+        results = await asyncio.gather(*[client.get() for _ in range(10)])
+        await client.aclose()
+        return results
+
+    assert asyncio.run(scenario()) == ["v1"] * 10
+    assert len(backend.requests) == 1
+
+
+def test_304_revalidation_keeps_body_and_digest(clock):
+    backend = FakeBackend()
+
+    async def scenario():
+        client = make_client(backend)
+        await client.get()
+        digest = client.digest
+
+        # stale 허용 시간까지 지나면 조건부 요청으로 다시 확인
+        clock.advance(60 + 300 + 1)
+        assert await client.get() == "v1"
+        assert client.digest == digest
+        assert client.fetched_at == clock.now
+        await client.aclose()
+
+    asyncio.run(scenario())
+    revalidation = backend.requests[-1]
+    assert len(backend.requests) == 2
+    assert revalidation.headers["If-None-Match"] == '"v1"'
+    assert revalidation.headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+def test_stale_while_revalidate_after_ttl(clock):
+    backend = FakeBackend()
+
+    async def scenario():
+        client = make_client(backend)
+        await client.get()
+        digest = client.digest
+
+        # TTL 이 지나면 기존 값을 바로 반환하고 백그라운드에서 갱신
+        backend.data, backend.etag = "v2", '"v2"'
+        clock.advance(61)
+        assert await client.get() == "v1"
+        await client._refresh_task
+
+        assert client.data == "v2"
+        assert client.digest != digest
+        assert client.etag == '"v2"'
+        # 갱신 직후는 다시 TTL 안
+        assert await client.get() == "v2"
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(backend.requests) == 2
+
+
+def test_invalidate_forces_refetch(clock):
+    backend = FakeBackend()
+
+    async def scenario():
+        client = make_client(backend)
+        await client.get()
+        backend.data, backend.etag = "v2", '"v2"'
+        client.invalidate()
+        assert await client.get() == "v2"
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(backend.requests) == 2
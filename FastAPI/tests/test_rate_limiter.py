@@ -0,0 +1,165 @@
+# tests/test_rate_limiter.py
+import asyncio
+import pytest
+import utils.rate_limiter as rate_limiter_module
+from utils.rate_limiter import ModelBudget, RateLimitExceeded, INTERACTIVE, BATCH, parse_duration, retry_after_from_headers
+from conftest import FakeClock
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # asyncio 의 실제 시계는 그대로 두고 limiter 모듈의 time 만 교체
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", clock)
+    return clock
+
+
+def start(budget, cost, priority=INTERACTIVE):
+    return asyncio.ensure_future(budget.acquire(cost, priority, max_wait=600))
+
+
+async def settle():
+    # future 결과가 대기 중인 task 로 전달되도록 이벤트 루프를 몇 번 돌림
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_token_budget_exhaustion_and_refill(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=600, tpm=1000)
+        await budget.acquire(600)
+        second = start(budget, 600)
+        await settle()
+        assert not second.done()
+
+        # 부족한 200 토큰은 1000 TPM 기준 12초 뒤에 채워짐
+        clock.advance(11.9)
+        budget._dispatch()
+        await settle()
+        assert not second.done()
+
+        clock.advance(0.1)
+        budget._dispatch()
+        await settle()
+        assert second.done()
+        assert budget.tokens == pytest.approx(0)
+
+    asyncio.run(scenario())
+
+
+def test_request_budget_exhaustion_and_refill(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=2, tpm=10**6)
+        await budget.acquire(1)
+        await budget.acquire(1)
+        third = start(budget, 1)
+        await settle()
+        assert not third.done()
+
+        # 2 RPM 이면 요청 1건은 30초마다 채워짐
+        clock.advance(30)
+        budget._dispatch()
+        await settle()
+        assert third.done()
+
+    asyncio.run(scenario())
+
+
+def test_interactive_requests_go_before_queued_batch(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=60, tpm=10**6)
+        budget.requests = 0.0
+        batch = start(budget, 1, BATCH)
+        await settle()
+        interactive = start(budget, 1, INTERACTIVE)
+        await settle()
+
+        # 요청 1건 분량만 채워지면 나중에 온 INTERACTIVE 가 먼저 실행
+        clock.advance(1)
+        budget._dispatch()
+        await settle()
+        assert interactive.done() and not batch.done()
+
+        clock.advance(1)
+        budget._dispatch()
+        await settle()
+        assert batch.done()
+
+    asyncio.run(scenario())
+
+
+def test_head_of_queue_is_not_starved_by_smaller_requests(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=600, tpm=1000)
+        budget.tokens = 0.0
+        large = start(budget, 800)
+        await settle()
+        small = start(budget, 100)
+        await settle()
+
+        # small 분량이 채워져도 앞에 기다리는 large 보다 먼저 실행되지 않음
+        clock.advance(6)
+        budget._dispatch()
+        await settle()
+        assert not large.done() and not small.done()
+
+        clock.advance(48)
+        budget._dispatch()
+        await settle()
+        assert large.done() and small.done()
+
+    asyncio.run(scenario())
+
+
+def test_acquire_times_out_with_retry_after(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=60, tpm=1000)
+        budget.tokens = 0.0
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            await budget.acquire(500, max_wait=0.01)
+        assert exc_info.value.retry_after == pytest.approx(30)
+        # 시간 초과된 요청은 대기열에서 정리됨
+        assert budget.snapshot()["queued"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_pause_blocks_until_retry_after(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=600, tpm=10**6)
+        assert budget.pause({"retry-after": "5"}) == 5
+        waiting = start(budget, 1)
+        await settle()
+        assert not waiting.done()
+
+        clock.advance(5)
+        budget._dispatch()
+        await settle()
+        assert waiting.done()
+        assert budget.throttled == 1
+
+    asyncio.run(scenario())
+
+
+def test_update_from_headers_lowers_budget(clock):
+    async def scenario():
+        budget = ModelBudget("m", rpm=600, tpm=10**6)
+        budget.update_from_headers({
+            "x-ratelimit-limit-requests": "100",
+            "x-ratelimit-limit-tokens": "5000",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-remaining-tokens": "2000"
+        })
+        assert (budget.rpm, budget.tpm) == (100, 5000)
+        assert budget.requests == 0 and budget.tokens == 2000
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_header_parsing():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("soon") is None
+    assert retry_after_from_headers({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert retry_after_from_headers({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "2.5s"}) == 2.5
+    assert retry_after_from_headers({}) == 1.0
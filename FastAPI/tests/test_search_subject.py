@@ -0,0 +1,77 @@
+# tests/test_search_subject.py
+import asyncio
+import json
+import time
+import httpx
+import pytest
+import routers.search_subject as search_subject
+from utils.project_info_client import ProjectInfoClient
+from utils.project_corpus import ProjectCorpus
+from utils.search_index import SearchIndex
+
+CORPUS = ProjectCorpus(
+    [1, 2, 3],
+    ["웹 기반 일정 관리 서비스", "머신러닝 추천 시스템", "모바일 게임 커뮤니티"],
+    [("react",), ("python",), ("unity",)]
+)
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    index = SearchIndex.build(CORPUS, source_digest="old")
+    index.path = str(tmp_path)
+    monkeypatch.setattr(search_subject, "search_index", index)
+    monkeypatch.setattr(search_subject, "rebuild_task", None)
+    monkeypatch.setattr(search_subject, "digest_check_task", None)
+    return index
+
+
+def use_backend(monkeypatch, handler):
+    client = ProjectInfoClient(url="http://backend.test/project-info", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(search_subject, "project_info_client", client)
+    return client
+
+
+def test_query_path_does_not_wait_for_project_info(monkeypatch, index):
+    async def hanging_backend(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200, content=b'{"data": "[]"}')
+
+    async def scenario():
+        client = use_backend(monkeypatch, hanging_backend)
+        start = time.perf_counter()
+        result = await search_subject.get_search_index()
+        elapsed = time.perf_counter() - start
+        client._refresh_task.cancel()
+        await client.aclose()
+        return result, elapsed
+
+    result, elapsed = asyncio.run(scenario())
+    assert result is index
+    assert elapsed < 1.0
+
+
+def test_changed_project_info_schedules_rebuild_in_background(monkeypatch, index):
+    rebuilt = []
+
+    async def fake_rebuild():
+        rebuilt.append(search_subject.project_info_client.digest)
+        return index
+
+    def backend(request):
+        return httpx.Response(200, content=json.dumps({"data": "[]"}).encode())
+
+    async def scenario():
+        client = use_backend(monkeypatch, backend)
+        monkeypatch.setattr(search_subject, "_rebuild", fake_rebuild)
+        # 여러 요청이 와도 digest 비교 / 재생성은 한 번
+        for _ in range(5):
+            assert await search_subject.get_search_index() is index
+        assert not rebuilt
+        await client._refresh_task
+        await asyncio.sleep(0)
+        await search_subject.rebuild_task
+        await client.aclose()
+
+    asyncio.run(scenario())
+    assert len(rebuilt) == 1
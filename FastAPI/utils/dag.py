@@ -0,0 +1,65 @@
+# utils/dag.py
+import time
+import asyncio
+
+class StageError(Exception):
+    """파이프라인 단계 실패 (실패한 단계 이름과 원래 예외를 함께 전달)"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+        self.error = error
+
+async def run_dag(stages):
+    """
+    의존 관계 그래프대로 단계를 실행하고, 끝나는 순서대로 (이름, 결과, 시간 정보) 를 내보내는 비동기 제너레이터
+
+    stages: {이름: (의존 단계 이름 tuple, async fn(inputs))}
+      - inputs 는 {의존 단계 이름: 결과} dict
+      - 의존 단계가 모두 끝나는 즉시 시작하므로 서로 의존하지 않는 단계는 동시에 실행된다
+    시간 정보: {"started_ms": 파이프라인 시작 기준 시작 시각, "elapsed_ms": 단계 소요 시간}
+    한 단계라도 실패하면 StageError 를 발생시키고 남은 단계는 취소한다
+    """
+    for name, (deps, _) in stages.items():
+        for dep in deps:
+            if dep not in stages:
+                raise KeyError(f"{name} 단계의 의존 단계 {dep} 가 없습니다")
+
+    origin = time.perf_counter()
+    tasks = {}
+    timings = {}
+
+    async def run(name):
+        deps, fn = stages[name]
+        inputs = {dep: await tasks[dep] for dep in deps}
+        start = time.perf_counter()
+        try:
+            result = await fn(inputs)
+        except Exception as e:
+            raise StageError(name, e) from e
+        timings[name] = {
+            "started_ms": round((start - origin) * 1000, 1),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+        return result
+
+    # 모든 task 를 먼저 만든 뒤 실행되므로 tasks[dep] 는 항상 존재
+    for name in stages:
+        tasks[name] = asyncio.ensure_future(run(name))
+    names = {task: name for name, task in tasks.items()}
+    pending = set(tasks.values())
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # 같은 시점에 끝난 단계는 시작 순서대로 전달
+            for task in sorted(done, key=lambda t: timings.get(names[t], {}).get("started_ms", float("inf"))):
+                name = names[task]
+                yield name, task.result(), timings[name]
+    finally:
+        for task in pending:
+            task.cancel()
+        for task in tasks.values():
+            # 취소/실패한 task 의 예외가 처리되지 않은 채로 남지 않도록 확인
+            if task.done() and not task.cancelled():
+                task.exception()
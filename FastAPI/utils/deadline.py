@@ -0,0 +1,50 @@
+# utils/deadline.py
+import time
+import contextvars
+
+# 현재 요청의 마감 시각 (time.monotonic 기준, 없으면 None)
+request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+def remaining_time():
+    """현재 요청 마감까지 남은 시간 (초), 마감이 없으면 None"""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def _parse_deadline(headers):
+    """
+    요청 헤더에서 마감 시각 계산 (둘 다 있으면 더 이른 쪽)
+    - X-Request-Deadline: 마감 시각 (unix epoch 초)
+    - X-Request-Timeout: 요청 시점부터 허용 시간 (초)
+    """
+    now = time.monotonic()
+    deadlines = []
+    for name, value in headers:
+        try:
+            if name == b"x-request-deadline":
+                deadlines.append(now + float(value) - time.time())
+            elif name == b"x-request-timeout":
+                deadlines.append(now + float(value))
+        except ValueError:
+            continue
+    return min(deadlines) if deadlines else None
+
+class DeadlineMiddleware:
+    """
+    호출자가 보낸 마감 시간을 request_deadline 컨텍스트 변수로 전달하는 ASGI 미들웨어
+    LLM 호출(utils.llm_call) 은 남은 시간을 넘겨 기다리지 않고, 재시도도 마감 안에서만 한다
+    (스트리밍 응답도 같은 컨텍스트에서 실행되므로 그대로 적용된다)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = request_deadline.set(_parse_deadline(scope["headers"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
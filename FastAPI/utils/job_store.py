@@ -0,0 +1,71 @@
+# utils/job_store.py
+import os
+import time
+import uuid
+import asyncio
+import logging
+from utils.deadline import request_deadline
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 완료된 작업 결과 보관 시간 (초)
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+
+class JobStore:
+    """
+    오래 걸리는 생성 작업을 백그라운드로 실행하고 결과를 조회하는 메모리 작업 저장소
+
+    submit -> job_id 발급 -> get(job_id) 로 상태(queued / running / done / failed) 와 결과 조회
+    완료 후 ttl 이 지난 작업은 다음 submit 시 정리한다.
+    """
+
+    def __init__(self, ttl=JOB_TTL):
+        self.ttl = ttl
+        self.jobs = {}
+        self.tasks = {}
+
+    def submit(self, job_fn, *args):
+        """
+        job_fn(*args, job=job) 코루틴을 백그라운드 task 로 실행하고 job_id 반환
+        job_fn 은 실제 작업을 시작할 때 job["status"] 를 "running" 으로 바꿀 수 있다
+        """
+        self._evict_expired()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None
+        }
+        self.jobs[job_id] = job
+        self.tasks[job_id] = asyncio.ensure_future(self._run(job, job_fn, args))
+        return job_id
+
+    async def _run(self, job, job_fn, args):
+        # 응답을 보낸 뒤에도 계속 실행되므로 제출한 요청의 마감 시간은 적용하지 않음
+        request_deadline.set(None)
+        try:
+            job["result"] = await job_fn(*args, job=job)
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = getattr(e, "detail", None) or str(e)
+            job["status"] = "failed"
+            logger.warning(f"작업 실패 ({job['job_id']}): {job['error']}")
+        finally:
+            job["finished_at"] = time.time()
+            self.tasks.pop(job["job_id"], None)
+
+    def get(self, job_id):
+        """작업 상태 dict 반환 (없으면 None)"""
+        return self.jobs.get(job_id)
+
+    def _evict_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job["finished_at"] is not None and now - job["finished_at"] > self.ttl]
+        for job_id in expired:
+            del self.jobs[job_id]
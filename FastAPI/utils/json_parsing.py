@@ -4,6 +4,12 @@ import ast
 import re
 import logging
 
+try:
+    import orjson
+    _fast_loads = orjson.loads
+except ImportError:  # orjson 미설치 환경은 표준 json 사용
+    _fast_loads = json.loads
+
 # 로거 설정
 logger = logging.getLogger(__name__)
 
@@ -13,12 +19,8 @@ def clean_escaped_quotes(text):
     if not isinstance(text, str):
         return str(text)  # 문자열이 아니면 그대로 반환
 
-    # 방법 1: 정규식으로 \' -> ' 변환
-    cleaned = re.sub(r"\\'", "'", text)
-    # 방법 2: 정규식으로 \" -> " 변환
-    cleaned = re.sub(r'\\"', '"', cleaned)
-    
-    return str(cleaned)
+    # \' -> ' , \" -> " 변환
+    return text.replace("\\'", "'").replace('\\"', '"')
 
 def clean_backslashes(text):
     """백슬래시를 완전히 제거하는 함수"""
@@ -31,57 +33,80 @@ def clean_backslashes(text):
     
     return cleaned
 
+# JSON 구조를 판단하는 데 필요한 문자만 건너뛰며 찾기 위한 패턴
+_JSON_TOKEN = re.compile(r'["\\{}\[\]]')
+
+def find_json_span(content):
+    """
+    첫 번째 JSON 객체/배열의 (시작, 끝) 위치를 한 번만 훑어서 찾는 함수
+    
+    - 문자열 리터럴 안의 괄호와 이스케이프(\\")는 무시
+    - 마크다운 코드 블록(```json)은 괄호가 아니므로 자연스럽게 건너뜀
+    - 시작점이 없으면 None, 끝점이 없으면 (시작, None)
+    """
+    
+    json_start_object = content.find('{')
+    json_start_array = content.find('[')
+    starts = [i for i in (json_start_object, json_start_array) if i != -1]
+    if not starts:
+        return None
+    json_start = min(starts)
+
+    depth = 0
+    in_string = False
+    skip = -1
+    
+    for match in _JSON_TOKEN.finditer(content, json_start):
+        i = match.start()
+        if i == skip:
+            continue
+        char = content[i]
+        
+        if in_string:
+            if char == '\\':
+                skip = i + 1  # 이스케이프된 다음 문자 무시
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return json_start, i + 1
+    
+    return json_start, None
+
+def strip_code_fence(content):
+    """앞뒤 공백과 마크다운 코드 블록(```json ... ```)만 잘라내는 함수 (본문은 복사/치환하지 않음)"""
+    
+    content = content.strip()
+    if content.startswith('```'):
+        newline = content.find('\n')
+        content = content[newline + 1:] if newline != -1 else content[3:]
+    if content.endswith('```'):
+        content = content[:-3]
+    return content.strip()
+
 def extract_json_from_response(content):
     """응답에서 순수 JSON만 추출하는 함수"""
     
     if not isinstance(content, str):
         return str(content)
     
-    # 마크다운 코드 블록 제거
-    content = re.sub(r'```json\s*', '', content)
-    content = re.sub(r'```\s*', '', content)
-    
-    # 앞뒤 공백 및 불필요한 텍스트 제거
-    content = content.strip()
-    
-    # JSON 시작점 찾기 (배열 또는 객체)
-    json_start_array = content.find('[')
-    json_start_object = content.find('{')
+    span = find_json_span(content)
     
-    # 가장 먼저 나오는 JSON 구조 선택
-    if json_start_array == -1 and json_start_object == -1:
+    if span is None:
         logger.warning("JSON 시작점을 찾을 수 없습니다")
-        return content
-    
-    if json_start_array == -1:
-        json_start = json_start_object
-        start_char = '{'
-        end_char = '}'
-    elif json_start_object == -1:
-        json_start = json_start_array
-        start_char = '['
-        end_char = ']'
-    else:
-        json_start = min(json_start_array, json_start_object)
-        start_char = content[json_start]
-        end_char = '}' if start_char == '{' else ']'
-    
-    # JSON 끝점 찾기 (중괄호/대괄호 균형 맞추기)
-    brace_count = 0
-    json_end = -1
-    
-    for i in range(json_start, len(content)):
-        if content[i] == start_char:
-            brace_count += 1
-        elif content[i] == end_char:
-            brace_count -= 1
-            if brace_count == 0:
-                json_end = i + 1
-                break
-    
-    if json_end == -1:
+        return content.strip()
+    
+    json_start, json_end = span
+    if json_end is None:
         logger.warning("JSON 끝점을 찾을 수 없습니다")
-        return content
+        return content[json_start:].strip()
     
     return content[json_start:json_end]
 
@@ -126,61 +151,174 @@ def safe_parse_requirements(text):
             return None
 
 def safe_parse_json(content):
-    """안전하게 JSON 문자열을 파싱하는 함수 (범용)"""
+    """
+    안전하게 JSON 문자열을 파싱하는 함수 (범용)
+    
+    JSON 구간을 한 번만 찾아 빠른 파서(orjson)로 바로 디코딩하고,
+    실패한 경우에만 단계적으로 정리 후 재시도한다.
+    """
     
     if not isinstance(content, str):
         logger.warning(f"JSON 파싱 대상이 문자열이 아닙니다: {type(content)}")
         return None
     
     try:
-        # 1단계: 순수 JSON 추출
-        clean_content = extract_json_from_response(content)
-        
-        # 2단계: 백슬래시 정리
-        clean_content = clean_escaped_quotes(clean_content)
-        
-        # 3단계: JSON 파싱 시도
-        json_data = json.loads(clean_content)
-        return json_data
+        # 1단계: 코드 블록만 걷어낸 응답 전체가 JSON 이면 스캔 없이 바로 파싱 (대부분의 응답)
+        stripped = strip_code_fence(content)
+        if stripped[:1] in ('{', '[') and stripped[-1:] in ('}', ']'):
+            try:
+                return _fast_loads(stripped)
+            except ValueError:
+                pass
         
-    except json.JSONDecodeError as e:
-        logger.warning(f"JSON 파싱 실패, 백슬래시 제거 후 재시도: {e}")
+        # 2단계: 앞뒤 설명문이 섞인 경우 순수 JSON 구간 추출 (단일 스캔) 후 빠른 파서로 파싱
+        clean_content = extract_json_from_response(content)
+        try:
+            return _fast_loads(clean_content)
+        except ValueError:
+            pass
         
+        # 3단계: 표준 json (NaN, 큰 정수, 문자열 내 줄바꿈 허용)
         try:
-            # 4단계: 백슬래시 완전 제거 후 재시도
-            clean_content = clean_backslashes(content)
-            clean_content = extract_json_from_response(clean_content)
-            json_data = json.loads(clean_content)
-            return json_data
-            
-        except json.JSONDecodeError as e2:
-            logger.warning(f"백슬래시 제거 후에도 JSON 파싱 실패: {e2}")
+            return json.loads(clean_content, strict=False)
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON 파싱 실패, 백슬래시 정리 후 재시도: {e}")
+        
+        if '\\' in content:
+            # 4단계: JSON 에서 허용되지 않는 \' 이스케이프 정리 후 재시도
+            try:
+                return json.loads(clean_content.replace("\\'", "'"), strict=False)
+            except json.JSONDecodeError:
+                pass
             
+            # 5단계: 백슬래시 완전 제거 후 재시도
             try:
-                # 5단계: ast.literal_eval 시도
-                clean_content = extract_json_from_response(content)
-                clean_content = clean_escaped_quotes(clean_content)
-                parsed_data = ast.literal_eval(clean_content)
-                return parsed_data
-                
-            except (ValueError, SyntaxError) as e3:
-                logger.error(f"ast.literal_eval도 실패: {e3}")
-                return None
+                return json.loads(extract_json_from_response(clean_backslashes(content)), strict=False)
+            except json.JSONDecodeError as e2:
+                logger.warning(f"백슬래시 제거 후에도 JSON 파싱 실패: {e2}")
+        
+        # 6단계: ast.literal_eval 시도 (Python 딕셔너리 형식)
+        try:
+            return ast.literal_eval(clean_escaped_quotes(clean_content))
+        except (ValueError, SyntaxError) as e3:
+            logger.error(f"ast.literal_eval도 실패: {e3}")
+            return None
     
     except Exception as e:
         logger.error(f"예상치 못한 오류: {e}")
         return None
 
-def validate_json_structure(data, required_keys=None):
-    """JSON 구조가 올바른지 검증하는 함수"""
+# json.dumps 시 이스케이프(백슬래시)가 생기는 문자: 큰따옴표, 백슬래시, 제어 문자
+_ESCAPED_CHARS = re.compile(r'["\\\x00-\x1f]')
+
+# 생성 결과물별 필수 구조 (required: 필수 키, properties: 하위 키별 스키마, items: 배열 원소 스키마)
+ERD_SCHEMA = {
+    "type": dict,
+    "required": ["erd_tables", "erd_relationships"],
+    "properties": {
+        "erd_tables": {"type": list, "items": {"type": dict, "required": ["name", "erd_columns"]}},
+        "erd_relationships": {"type": list, "items": {"type": dict}}
+    }
+}
+
+API_SCHEMA = {
+    "type": dict,
+    "required": ["apiSpecifications"],
+    "properties": {
+        "apiSpecifications": {"type": list, "items": {"type": dict, "required": ["path", "http_method"]}}
+    }
+}
+
+# 유효하지 않은 입력이면 {"error": ...} 를 반환하므로 project_info 는 필수로 두지 않음
+SUMMARY_SCHEMA = {
+    "type": dict,
+    "properties": {
+        "project_info": {"type": dict}
+    }
+}
+
+REQUIREMENTS_SCHEMA = {
+    "type": list,
+    "items": {"type": dict, "required": ["requirementType", "content"]}
+}
+
+def _has_escaped_chars(data):
+    """
+    직렬화 시 백슬래시가 생기는 문자열(키 포함)이 있는지 검사
+    컨테이너만 스택으로 순회하며 문자열을 모아 정규식 검색은 한 번만 수행
+    """
+    
+    strings = []
+    collect = strings.append
+    stack = [data]
+    
+    while stack:
+        node = stack.pop()
+        if type(node) is dict:
+            strings.extend(node)
+            values = node.values()
+        else:
+            values = node
+        for value in values:
+            value_type = type(value)
+            if value_type is str:
+                collect(value)
+            elif value_type is dict or value_type is list:
+                stack.append(value)
+    
+    try:
+        text = " ".join(strings)
+    except TypeError:  # ast.literal_eval 결과의 문자열이 아닌 키
+        text = " ".join(item for item in strings if type(item) is str)
+    return _ESCAPED_CHARS.search(text) is not None
+
+def _find_schema_error(data, schema):
+    """
+    스키마에 정의된 단계만 내려가며 타입 / 필수 키 검사
+    오류가 있으면 (역순 경로 리스트, 메시지) 반환 (경로는 오류가 난 경우에만 만든다), 없으면 None
+    """
+    
+    expected = schema.get("type")
+    if expected is not None and not isinstance(data, expected):
+        return [], f"{expected.__name__} 타입이 아닙니다"
+    
+    if isinstance(data, dict):
+        missing_keys = [key for key in schema.get("required", ()) if key not in data]
+        if missing_keys:
+            return [], f"필수 키가 누락되었습니다: {missing_keys}"
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in data:
+                error = _find_schema_error(data[key], sub_schema)
+                if error:
+                    error[0].append(f".{key}")
+                    return error
+    
+    elif isinstance(data, list) and "items" in schema:
+        item_schema = schema["items"]
+        for i, item in enumerate(data):
+            error = _find_schema_error(item, item_schema)
+            if error:
+                error[0].append(f"[{i}]")
+                return error
+    
+    return None
+
+def validate_json_structure(data, required_keys=None, schema=None):
+    """
+    JSON 구조가 올바른지 검증하는 함수
+    
+    전체를 다시 직렬화(json.dumps)하지 않고
+    - 직렬화 시 백슬래시가 생기는 문자(큰따옴표, 백슬래시, 제어 문자) 포함 여부
+    - schema 의 타입 / 필수 키 (ERD_SCHEMA, API_SCHEMA 등)
+    를 검사한다.
+    """
     
     if not isinstance(data, (dict, list)):
         logger.error("데이터가 딕셔너리나 리스트가 아닙니다")
         return False
     
     # 백슬래시 포함 여부 검증
-    json_str = json.dumps(data, ensure_ascii=False)
-    if '\\' in json_str:
+    if _has_escaped_chars(data):
         logger.warning("JSON에 백슬래시가 포함되어 있습니다")
         return False
     
@@ -191,6 +329,14 @@ def validate_json_structure(data, required_keys=None):
             logger.error(f"필수 키가 누락되었습니다: {missing_keys}")
             return False
     
+    # 스키마 검증
+    if schema:
+        error = _find_schema_error(data, schema)
+        if error:
+            path, message = error
+            logger.error(f"${''.join(reversed(path))}: {message}")
+            return False
+    
     return True
 
 def clean_and_parse_response(content, response_type="json"):
@@ -0,0 +1,123 @@
+# utils/json_stream.py
+import re
+import logging
+from utils.json_parsing import _fast_loads, safe_parse_json
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 스캔 시 의미 있는 문자 (문자열 경계 / 괄호)
+_JSON_TOKEN = re.compile(r'["{}\[\]]')
+
+class IncrementalJSONParser:
+    """
+    LLM 스트림 청크를 받아 완성된 배열 원소를 바로 꺼내주는 증분 파서
+
+    - keys 지정 시: 최상위 객체에서 해당 키의 배열 원소 (예: erd_tables, apiSpecifications)
+    - keys 가 None 이면: 최상위 배열의 원소 (예: requirements 리스트)
+
+    원소가 닫히는 순간 (key, index, value) 를 반환하므로 전체 응답을 기다리지 않아도 된다.
+    이미 스캔한 위치는 다시 보지 않으며, 문자열 안의 괄호 / 이스케이프는 무시한다.
+    코드 블록이나 앞 설명문은 첫 '{' / '[' 이전이므로 자연스럽게 건너뛴다.
+    """
+
+    def __init__(self, keys=None):
+        self.keys = set(keys) if keys else None
+        self.buffer = ""
+        self.pos = 0
+        self.in_string = False
+        self.string_start = 0
+        self.stack = []             # 열린 괄호 스택
+        self.last_key = None        # 최상위 객체에서 마지막으로 닫힌 문자열 (키 후보)
+        self.target_key = None      # 현재 원소를 모으고 있는 배열의 키
+        self.element_start = None   # 현재 원소의 시작 위치
+        self.counts = {}            # 키별로 내보낸 원소 수
+        self.done = False           # 최상위 JSON 이 닫혔는지 여부
+
+    @property
+    def text(self):
+        """지금까지 받은 전체 응답"""
+        return self.buffer
+
+    def feed(self, chunk):
+        """청크를 추가하고 이번에 완성된 원소 목록 [(key, index, value), ...] 반환"""
+        if not chunk:
+            return []
+        self.buffer += chunk
+        if self.done:
+            return []
+
+        elements = []
+        buffer = self.buffer
+        stack = self.stack
+        element_depth = 2 if self.keys else 1
+
+        for match in _JSON_TOKEN.finditer(buffer, self.pos):
+            char = match.group()
+            index = match.start()
+
+            if self.in_string:
+                # 문자열 안에서는 이스케이프되지 않은 따옴표만 의미 있음
+                if char == '"' and not self._escaped(index):
+                    self.in_string = False
+                    if len(stack) == 1 and self.keys:
+                        self.last_key = buffer[self.string_start + 1:index]
+                continue
+
+            if char == '"':
+                if stack:
+                    self.in_string = True
+                    self.string_start = index
+            elif char in '{[':
+                if len(stack) == element_depth and self.target_key is not None:
+                    self.element_start = index
+                stack.append(char)
+                if len(stack) == element_depth:
+                    self.target_key = self._target_for(char)
+            elif char in '}]':
+                if not stack:
+                    continue
+                stack.pop()
+                if len(stack) == element_depth and self.element_start is not None:
+                    value = self._decode(buffer[self.element_start:index + 1])
+                    self.element_start = None
+                    if value is not None:
+                        count = self.counts.get(self.target_key, 0)
+                        self.counts[self.target_key] = count + 1
+                        elements.append((self.target_key, count, value))
+                elif len(stack) == element_depth - 1:
+                    self.target_key = None
+                if not stack:
+                    self.done = True
+                    self.pos = index + 1
+                    return elements
+
+        self.pos = len(buffer)
+        return elements
+
+    def _escaped(self, index):
+        """index 위치의 따옴표 앞 연속 백슬래시가 홀수개면 이스케이프된 따옴표"""
+        count = 0
+        index -= 1
+        while index >= 0 and self.buffer[index] == '\\':
+            count += 1
+            index -= 1
+        return count % 2 == 1
+
+    def _target_for(self, char):
+        """원소를 모을 배열에 진입했는지 판단하여 대상 키 반환"""
+        if char != '[':
+            return None
+        if self.keys is None:
+            return "items" if len(self.stack) == 1 else None
+        return self.last_key if self.last_key in self.keys else None
+
+    @staticmethod
+    def _decode(text):
+        try:
+            return _fast_loads(text)
+        except ValueError:
+            value = safe_parse_json(text)
+            if value is None:
+                logger.warning(f"스트림 원소 파싱 실패: {text[:100]}")
+            return value
@@ -0,0 +1,178 @@
+# utils/llm_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from utils.singleflight import llm_singleflight
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 캐시 설정
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))  # 캐시 유효 시간 (초)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))  # 메모리 LRU 최대 항목 수
+LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "")  # 지정 시 디스크(SQLite) 캐시 사용
+LLM_CACHE_MAX_DISK_MB = float(os.getenv("LLM_CACHE_MAX_DISK_MB", "256"))  # 디스크 캐시 최대 크기
+
+def make_cache_key(messages, **params):
+    """
+    프롬프트 메시지(시스템 프롬프트 포함) + 생성 파라미터로 만든 내용 기반 캐시 키
+    메시지 앞뒤 공백 차이는 같은 요청으로 본다
+    """
+    normalized = {
+        "messages": [{"role": m["role"], "content": m["content"].strip()} for m in messages],
+        "params": params
+    }
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SQLiteCacheTier:
+    """디스크 캐시 (만료 항목 삭제 + 최대 크기 초과 시 오래 사용하지 않은 항목부터 삭제)"""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self.conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        return json.loads(value), expires_at
+
+    def set(self, key, value, expires_at):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload.encode("utf-8")), expires_at, now)
+            )
+            self.conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+            self._evict_oversize()
+            self.conn.commit()
+
+    def _evict_oversize(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 오래 사용하지 않은 항목부터 초과분만큼 삭제
+        freed = 0
+        stale_keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+            stale_keys.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self.conn.executemany("DELETE FROM llm_cache WHERE key = ?", stale_keys)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class LLMCache:
+    """
+    LLM 생성 결과 캐시 - 메모리 LRU + (선택) SQLite 디스크 캐시
+
+    - 키: make_cache_key (프롬프트 + 파라미터 해시)
+    - 값: 검증까지 끝난 응답 dict (실패한 생성은 저장하지 않음)
+    - 메모리에 없으면 디스크에서 찾아 메모리로 올린다
+    """
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES,
+                 sqlite_path=LLM_CACHE_SQLITE_PATH, max_disk_mb=LLM_CACHE_MAX_DISK_MB):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.disk = SQLiteCacheTier(sqlite_path, int(max_disk_mb * 1024 * 1024)) if sqlite_path else None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key):
+        entry = self.memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at >= time.time():
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.memory[key]
+
+        if self.disk is not None:
+            try:
+                entry = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"디스크 캐시 조회 실패: {e}")
+                entry = None
+            if entry is not None:
+                self._remember(key, *entry)
+                self.hits += 1
+                return entry[0]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"디스크 캐시 저장 실패: {e}")
+
+    def _remember(self, key, value, expires_at):
+        self.memory[key] = (value, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+llm_cache = LLMCache()
+
+async def cached_generate(cache_key, generate, response_model, use_cache=True):
+    """
+    캐시에 있으면 response_model 로 바로 반환, 없으면 generate() 로 생성 후 저장
+    use_cache=False 면 캐시를 읽지 않고 새로 생성한다 (새 결과로 캐시 갱신)
+    동시에 들어온 같은 요청은 하나의 생성을 함께 기다린다 (single-flight, use_cache=False 는 합류하지 않음)
+    """
+    async def generate_and_store():
+        result = await generate()
+        await llm_cache.set(cache_key, result.model_dump(by_alias=True))
+        return result
+
+    if not use_cache:
+        # 새 생성을 요청했으므로 먼저 시작된 같은 요청의 결과를 공유하지 않음
+        return await generate_and_store()
+
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        return response_model.model_validate(cached)
+    return await llm_singleflight.do(cache_key, generate_and_store)
@@ -0,0 +1,160 @@
+# utils/llm_call.py
+import os
+import math
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+import openai
+from fastapi import HTTPException
+from utils.rate_limiter import rate_limiter, estimate_tokens, RateLimitExceeded, INTERACTIVE, LLM_RATE_LIMIT_MAX_WAIT
+from utils.llm_client import LLM_TIMEOUT, LLM_MAX_RETRIES
+from utils.deadline import remaining_time
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 재시도 백오프 설정 (full jitter: 0 ~ min(최대, 기본 * 2^시도) 사이 임의 대기)
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+
+# 헤징 설정 (응답이 모델별 지연 분위수를 넘기면 같은 요청을 하나 더 보내 먼저 끝난 결과 사용)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # 분위수 계산에 필요한 최소 응답 수
+
+# 재시도할 상태 코드 (OpenAI SDK 기본 재시도 기준과 동일)
+RETRYABLE_STATUS = (408, 409, 429)
+
+def rate_limit_exception(detail, retry_after):
+    """429 + Retry-After 헤더 HTTPException"""
+    return HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+class LatencyTracker:
+    """모델별 최근 성공 응답 시간 기록 (헤징 지연 계산용)"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self.samples = {}
+
+    def record(self, model, elapsed):
+        self.samples.setdefault(model, deque(maxlen=self.window)).append(elapsed)
+
+    def quantile(self, model, q):
+        samples = self.samples.get(model)
+        if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+llm_latency = LatencyTracker()
+
+def _is_retryable(e):
+    if isinstance(e, (asyncio.TimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code in RETRYABLE_STATUS or e.status_code >= 500
+    return False
+
+def _final_exception(model, e, budget):
+    """재시도를 모두 쓴 (또는 마감이 지난) 오류를 HTTPException 으로 변환"""
+    if isinstance(e, openai.RateLimitError):
+        retry_after = max(budget.paused_until - time.monotonic(), 1.0)
+        return rate_limit_exception(f"{model} 호출 한도 초과: {e.message}", retry_after)
+    if isinstance(e, (asyncio.TimeoutError, openai.APITimeoutError)):
+        return HTTPException(status_code=504, detail=f"{model} 응답 시간 초과")
+    return HTTPException(status_code=502, detail=f"{model} 호출 오류: {e}")
+
+async def _attempt(client, budget, priority, params, timeout):
+    """예산 확보 후 한 번 호출 (non-stream 은 timeout 안에 응답 전체를 받아야 함)"""
+    start = time.monotonic()
+    try:
+        await budget.acquire(
+            estimate_tokens(params["messages"], params.get("max_tokens")), priority,
+            max_wait=min(LLM_RATE_LIMIT_MAX_WAIT, timeout)
+        )
+    except RateLimitExceeded as e:
+        raise rate_limit_exception(f"{params['model']} 호출이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.", e.retry_after)
+
+    timeout -= time.monotonic() - start
+    if timeout <= 0:
+        raise asyncio.TimeoutError()
+    sent = time.monotonic()
+    try:
+        raw = await asyncio.wait_for(
+            client.chat.completions.with_raw_response.create(**params, timeout=timeout), timeout
+        )
+    except openai.RateLimitError as e:
+        budget.pause(e.response.headers)
+        raise
+
+    budget.update_from_headers(raw.headers)
+    if not params.get("stream"):
+        llm_latency.record(params["model"], time.monotonic() - sent)
+    return raw.parse()
+
+async def _hedged(make_attempt, delay):
+    """첫 요청이 delay 안에 끝나지 않으면 두 번째 요청을 보내고 먼저 성공한 결과 반환 (나머지는 취소)"""
+    first = asyncio.ensure_future(make_attempt())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        return first.result()
+
+    logger.info(f"응답 지연 {delay:.2f}초 초과, 헤지 요청 전송")
+    pending = {first, asyncio.ensure_future(make_attempt())}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+            if not pending:
+                raise done.pop().exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def chat_completion(client: openai.AsyncOpenAI, priority=INTERACTIVE, hedge=LLM_HEDGE, **params):
+    """
+    모든 OpenAI chat completion 호출의 단일 진입점 (params 는 chat.completions.create 인자 그대로)
+
+    - 모델별 RPM / TPM 예산에서 요청 토큰 추정치를 차감할 수 있을 때까지 우선순위 대기열에서 대기
+    - 응답의 x-ratelimit-* 헤더로 한도를 갱신, 429 면 retry-after 동안 해당 모델 호출을 멈춤
+    - 연결 오류 / 시간 초과 / 408, 409, 429, 5xx 는 지터 백오프로 최대 LLM_MAX_RETRIES 번 재시도
+    - 호출 시간은 LLM_TIMEOUT 과 요청 마감(X-Request-Deadline / X-Request-Timeout) 중 짧은 쪽,
+      마감 안에 끝낼 수 없는 재시도는 하지 않는다
+    - hedge=True 면 모델별 응답 시간 분위수(LLM_HEDGE_QUANTILE) 를 넘긴 요청에 헤지 요청 추가 (stream 제외)
+    - 최종 실패는 HTTPException 으로 변환 (한도 초과 429, 시간 초과 504, 그 외 502)
+    stream=True 면 AsyncStream 을 반환한다 (시간 제한은 응답 시작까지만 적용)
+    """
+    model = params["model"]
+    budget = rate_limiter.budget(model)
+    attempt = 0
+
+    while True:
+        remaining = remaining_time()
+        timeout = LLM_TIMEOUT if remaining is None else min(LLM_TIMEOUT, remaining)
+        if timeout <= 0:
+            raise HTTPException(status_code=504, detail=f"{model} 호출 전 요청 마감 시간이 지났습니다")
+
+        try:
+            delay = llm_latency.quantile(model, LLM_HEDGE_QUANTILE) if hedge and not params.get("stream") else None
+            if delay is not None and delay < timeout:
+                return await _hedged(lambda: _attempt(client, budget, priority, params, timeout), delay)
+            return await _attempt(client, budget, priority, params, timeout)
+        except Exception as e:
+            if not _is_retryable(e):
+                raise
+            attempt += 1
+            backoff = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+            remaining = remaining_time()
+            if attempt > LLM_MAX_RETRIES or (remaining is not None and remaining <= backoff):
+                raise _final_exception(model, e, budget) from e
+            logger.warning(f"{model} 호출 실패 ({type(e).__name__}), {backoff:.2f}초 후 재시도 ({attempt}/{LLM_MAX_RETRIES})")
+            # 429 로 멈춘 예산은 다음 시도의 acquire 에서 기다린다
+            await asyncio.sleep(backoff)
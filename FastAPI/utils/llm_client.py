@@ -0,0 +1,68 @@
+# utils/llm_client.py
+import os
+import logging
+import importlib.util
+import httpx
+import openai
+from dotenv import load_dotenv
+
+# 환경변수 로드
+load_dotenv()
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# OpenAI 커넥션 풀 / 타임아웃 설정
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))  # 유휴 연결 유지 시간 (초)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "180"))  # 생성 응답 대기 시간 (초)
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))  # utils.llm_call 의 재시도 횟수
+
+# HTTP/2 는 h2 패키지(httpx[http2])가 설치된 경우에만 사용 (하나의 연결로 여러 요청 다중화)
+LLM_HTTP2_REQUESTED = os.getenv("LLM_HTTP2", "1") == "1"
+LLM_HTTP2 = LLM_HTTP2_REQUESTED and importlib.util.find_spec("h2") is not None
+
+def _limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+    )
+
+def _timeout():
+    return openai.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+def create_llm_client():
+    """튜닝된 커넥션 풀을 사용하는 AsyncOpenAI 클라이언트 생성 (OPENAI_BASE_URL 로 대상 서버 변경 가능)"""
+    if LLM_HTTP2_REQUESTED and not LLM_HTTP2:
+        logger.warning("h2 패키지가 없어 HTTP/1.1 로 연결합니다 (HTTP/2 를 쓰려면 httpx[http2] 설치)")
+    http_client = openai.DefaultAsyncHttpxClient(limits=_limits(), http2=LLM_HTTP2)
+    logger.info(f"LLM 클라이언트 생성 (max_connections={LLM_MAX_CONNECTIONS}, http2={LLM_HTTP2})")
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=http_client,
+        timeout=_timeout(),
+        max_retries=0  # 재시도는 utils.llm_call 에서 (지터 백오프 + 요청 마감 시간 반영)
+    )
+
+# 앱 전체에서 공유하는 클라이언트 (lifespan 에서 생성/종료)
+_llm_client = None
+
+def init_llm_client():
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = create_llm_client()
+    return _llm_client
+
+def get_llm_client():
+    """라우터 의존성 - 공유 AsyncOpenAI 클라이언트 반환 (lifespan 밖에서 호출되면 생성)"""
+    return init_llm_client()
+
+async def close_llm_client():
+    """공유 클라이언트의 커넥션 풀 종료"""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
@@ -0,0 +1,76 @@
+# utils/project_corpus.py
+import sys
+import ast
+import json
+import logging
+import numpy as np
+
+try:
+    import orjson
+    _fast_loads = orjson.loads
+except ImportError:  # orjson 미설치 환경은 표준 json 사용
+    _fast_loads = json.loads
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+def loads(text):
+    """JSON 디코딩 (orjson 우선, Python dict 문자열이면 ast.literal_eval 로 대체)"""
+    if isinstance(text, (dict, list)):
+        return text
+    try:
+        return _fast_loads(text)
+    except ValueError:
+        logger.warning("JSON 디코딩 실패, ast.literal_eval 로 재시도")
+        return ast.literal_eval(text if isinstance(text, str) else text.decode("utf-8"))
+
+# 소문자 stack 토큰 -> interned 문자열 / 동일한 stack 조합은 같은 tuple 객체 공유
+_stack_cache = {}
+
+def normalize_stack(stack):
+    """기술 스택 목록을 소문자 interned 토큰 tuple 로 변환"""
+    key = tuple(stack or ())
+    cached = _stack_cache.get(key)
+    if cached is None:
+        cached = tuple(sys.intern(str(item).lower()) for item in key)
+        _stack_cache[key] = cached
+    return cached
+
+class ProjectCorpus:
+    """project-info payload 를 한 번만 디코딩한 컬럼형 데이터"""
+
+    __slots__ = ("ids", "subjects", "stacks")
+
+    def __init__(self, ids, subjects, stacks):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.subjects = list(subjects)
+        self.stacks = list(stacks)
+
+    def __len__(self):
+        return len(self.subjects)
+
+def decode_project_info(data):
+    """
+    project-info data(JSON 문자열)를 한 번에 디코딩하여 ProjectCorpus 로 변환
+
+    - workspaceId -> int64 배열
+    - problemSolving.solutionIdea -> 문자열 리스트
+    - technologyStack -> 소문자 interned 토큰 tuple 리스트
+    """
+    user_project_info = loads(data)
+
+    ids = np.empty(len(user_project_info), dtype=np.int64)
+    subjects = []
+    stacks = []
+
+    for i, item in enumerate(user_project_info):
+        ids[i] = item['workspaceId']
+        subjects.append(str(item['problemSolving']['solutionIdea'] or ""))
+        stacks.append(normalize_stack(item['technologyStack']))
+
+    return ProjectCorpus(ids, subjects, stacks)
+
+def parse_project_info(project_info):
+    """요청으로 들어온 project_info 하나에서 (workspaceId, solutionIdea, technologyStack) 추출 (workspaceId 는 없으면 None)"""
+    item = loads(project_info)
+    return item.get('workspaceId'), item['problemSolving']['solutionIdea'], normalize_stack(item['technologyStack'])
@@ -0,0 +1,132 @@
+# utils/project_info_client.py
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import httpx
+from utils.project_corpus import loads
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 백엔드 project-info 조회 API (로컬 테스트 서버로 교체 가능)
+PROJECT_INFO_URL = os.getenv("PROJECT_INFO_URL", "http://13.125.204.95:8080/api/workspaces/project-info")
+
+# 캐시 설정 (초)
+PROJECT_INFO_TTL = float(os.getenv("PROJECT_INFO_TTL", "60"))
+PROJECT_INFO_STALE_TTL = float(os.getenv("PROJECT_INFO_STALE_TTL", "300"))
+PROJECT_INFO_TIMEOUT = float(os.getenv("PROJECT_INFO_TIMEOUT", "10"))
+PROJECT_INFO_MAX_CONNECTIONS = int(os.getenv("PROJECT_INFO_MAX_CONNECTIONS", "10"))
+
+class ProjectInfoClient:
+    """
+    project-info 조회용 비동기 클라이언트
+
+    - httpx.AsyncClient 커넥션 풀 재사용 (요청마다 TCP 연결 생성 X)
+    - TTL 이내면 캐시 그대로 반환
+    - TTL 이 지났지만 stale 허용 시간 이내면 캐시를 반환하고 백그라운드에서 갱신
+    - 갱신 시 ETag / Last-Modified 로 조건부 요청 (304 면 본문 재사용)
+    - 동시에 들어온 조회는 하나의 fetch 를 공유
+    transport 를 주면 httpx.AsyncClient 에 그대로 전달 (테스트용 httpx.MockTransport 등)
+    """
+
+    def __init__(self, url=PROJECT_INFO_URL, ttl=PROJECT_INFO_TTL, stale_ttl=PROJECT_INFO_STALE_TTL,
+                 timeout=PROJECT_INFO_TIMEOUT, max_connections=PROJECT_INFO_MAX_CONNECTIONS, transport=None):
+        self.url = url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+
+        self.data = None
+        self.digest = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = None
+
+        self._client = None
+        self._refresh_task = None
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                transport=self.transport
+            )
+        return self._client
+
+    async def get(self):
+        """project-info 의 data 필드(JSON 문자열) 반환"""
+        if self.data is not None:
+            age = time.monotonic() - self.fetched_at
+            if age < self.ttl:
+                return self.data
+            if age < self.ttl + self.stale_ttl:
+                # stale-while-revalidate: 기존 값 반환 + 백그라운드 갱신
+                self._start_refresh()
+                return self.data
+
+        await asyncio.shield(self._start_refresh())
+        return self.data
+
+    def refresh_in_background(self):
+        """
+        기다리지 않는 갱신 - TTL 안이면 None, 지났으면 백그라운드 갱신 task 반환 (진행 중인 갱신은 공유)
+        네트워크를 기다리면 안 되는 경로(검색 요청 등)에서 사용
+        """
+        if self.data is not None and time.monotonic() - self.fetched_at < self.ttl:
+            return None
+        return self._start_refresh()
+
+    def _start_refresh(self):
+        """진행 중인 갱신이 있으면 공유, 없으면 새로 시작"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._fetch())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    @staticmethod
+    def _log_refresh_error(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"project-info 갱신 실패: {task.exception()}")
+
+    async def _fetch(self):
+        headers = {}
+        if self.data is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        response = await self._get_client().get(self.url, headers=headers)
+
+        if response.status_code == 304 and self.data is not None:
+            self.fetched_at = time.monotonic()
+            return
+
+        response.raise_for_status()
+        data = loads(response.content)['data']
+
+        self.data = data
+        self.digest = hashlib.sha1(str(data).encode("utf-8")).hexdigest()
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.fetched_at = time.monotonic()
+        logger.info(f"project-info 갱신 완료 (digest={self.digest[:8]})")
+
+    def invalidate(self):
+        """다음 조회 시 강제로 다시 받아오도록 캐시 만료 처리"""
+        self.fetched_at = float("-inf") if self.data is not None else None
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+project_info_client = ProjectInfoClient()
@@ -0,0 +1,206 @@
+# utils/rate_limiter.py
+import os
+import re
+import json
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 모델별 한도 (응답 헤더를 받기 전까지 사용하는 초기값)
+LLM_DEFAULT_RPM = int(os.getenv("LLM_DEFAULT_RPM", "500"))
+LLM_DEFAULT_TPM = int(os.getenv("LLM_DEFAULT_TPM", "200000"))
+# 모델별 초기 한도 JSON, 예: {"gpt-4o": {"rpm": 500, "tpm": 30000}}
+LLM_RATE_LIMITS = json.loads(os.getenv("LLM_RATE_LIMITS", "") or "{}")
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "60"))  # 대기열 최대 대기 시간 (초), 초과 시 429
+LLM_DEFAULT_COMPLETION_TOKENS = int(os.getenv("LLM_DEFAULT_COMPLETION_TOKENS", "1000"))  # max_tokens 가 없는 요청의 생성 토큰 추정치
+
+# 대기열 우선순위 (작을수록 먼저)
+INTERACTIVE = 0  # 사용자가 응답을 기다리는 요청
+BATCH = 1  # task_generate 작업 등 기다려도 되는 요청
+
+class RateLimitExceeded(Exception):
+    """대기열에서 LLM_RATE_LIMIT_MAX_WAIT 안에 차례가 오지 않음"""
+
+    def __init__(self, model, retry_after):
+        super().__init__(f"{model} 호출 대기 시간 초과")
+        self.model = model
+        self.retry_after = retry_after
+
+def estimate_tokens(messages, max_tokens=None):
+    """
+    요청 하나가 TPM 에서 차지할 토큰 추정치
+    OpenAI 와 같은 방식으로 프롬프트는 글자 수 / 4, 생성은 max_tokens 전체를 미리 차감한다
+    """
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + 4 * len(messages) + (max_tokens or LLM_DEFAULT_COMPLETION_TOKENS)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_duration(value):
+    """x-ratelimit-reset-* 형식 ("1s", "6m0s", "20ms") 을 초로 변환, 형식이 다르면 None"""
+    if not value:
+        return None
+    matches = _DURATION.findall(value)
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+def _header_number(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+def retry_after_from_headers(headers, default=1.0):
+    """429 응답의 재시도 대기 시간 (retry-after-ms > retry-after > x-ratelimit-reset-*)"""
+    retry_after_ms = _header_number(headers, "retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    retry_after = _header_number(headers, "retry-after")
+    if retry_after is not None:
+        return retry_after
+    resets = [parse_duration(headers.get(name)) for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else default
+
+class ModelBudget:
+    """
+    모델 하나의 RPM / TPM 토큰 버킷 + 우선순위 대기열
+
+    - 요청 수 / 토큰 예산은 분당 한도에 맞춰 연속적으로 채워진다
+    - 대기열 맨 앞(가장 높은 우선순위, 같은 우선순위면 먼저 온 요청) 부터 예산이 될 때 실행
+      (앞 요청이 기다리는 동안 뒤 요청이 끼어들지 않으므로 큰 요청도 굶지 않는다)
+    - 응답 헤더의 한도 / 남은 양으로 예산을 보정하고, 429 를 받으면 retry-after 동안 멈춘다
+    """
+
+    def __init__(self, model, rpm, tpm):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.queue = []  # (priority, seq, cost, future) heap
+        self.seq = itertools.count()
+        self.timer = None
+        self.throttled = 0  # 429 응답 수
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+        self.updated = now
+
+    def _wait_time(self, cost, now):
+        if now < self.paused_until:
+            return self.paused_until - now
+        # 한도보다 큰 요청은 예산이 가득 찼을 때 실행
+        cost = min(cost, self.tpm)
+        wait_requests = max(0.0, 1 - self.requests) * 60 / self.rpm
+        wait_tokens = max(0.0, cost - self.tokens) * 60 / self.tpm
+        return max(wait_requests, wait_tokens)
+
+    def _dispatch(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self.queue:
+            _, _, cost, future = self.queue[0]
+            if future.done():  # 대기 중 취소 / 시간 초과된 요청
+                heapq.heappop(self.queue)
+                continue
+            wait = self._wait_time(cost, now)
+            if wait > 0:
+                self.timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self.queue)
+            self.requests -= 1
+            self.tokens -= min(cost, self.tpm)
+            future.set_result(None)
+
+    async def acquire(self, cost, priority=INTERACTIVE, max_wait=LLM_RATE_LIMIT_MAX_WAIT):
+        """예산이 생길 때까지 대기열에서 기다린 뒤 cost 만큼 차감, max_wait 초과 시 RateLimitExceeded"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, next(self.seq), cost, future))
+        self._dispatch()
+        if future.done():
+            return
+        try:
+            await asyncio.wait_for(future, max_wait)
+        except asyncio.TimeoutError:
+            self._dispatch()
+            raise RateLimitExceeded(self.model, self._wait_time(cost, time.monotonic()) or 1.0)
+        except asyncio.CancelledError:
+            self._dispatch()
+            raise
+
+    def update_from_headers(self, headers):
+        """응답의 x-ratelimit-* 헤더로 한도와 남은 예산 보정 (서버 기준이 더 적으면 따른다)"""
+        limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+        limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+
+        self._refill(time.monotonic())
+        if limit_requests:
+            self.rpm = int(limit_requests)
+        if limit_tokens:
+            self.tpm = int(limit_tokens)
+        if remaining_requests is not None:
+            self.requests = min(self.requests, remaining_requests)
+        if remaining_tokens is not None:
+            self.tokens = min(self.tokens, remaining_tokens)
+        self._dispatch()
+
+    def pause(self, headers):
+        """429 응답을 받으면 retry-after 동안 이 모델의 호출을 멈추고 대기 시간(초) 반환"""
+        retry_after = retry_after_from_headers(headers)
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self.requests = min(self.requests, 0.0)
+        logger.warning(f"{self.model} 호출 한도 초과 (429), {retry_after:.2f}초 동안 호출 중지")
+        self._dispatch()
+        return retry_after
+
+    def snapshot(self):
+        self._refill(time.monotonic())
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "requests_available": round(self.requests, 2),
+            "tokens_available": round(self.tokens),
+            "queued": sum(1 for *_, future in self.queue if not future.done()),
+            "throttled": self.throttled
+        }
+
+class RateLimiter:
+    """모델 이름별 ModelBudget 관리 (처음 쓰는 모델은 LLM_RATE_LIMITS / 기본값으로 생성)"""
+
+    def __init__(self, limits=LLM_RATE_LIMITS, default_rpm=LLM_DEFAULT_RPM, default_tpm=LLM_DEFAULT_TPM):
+        self.limits = limits
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.budgets = {}
+
+    def budget(self, model):
+        budget = self.budgets.get(model)
+        if budget is None:
+            limits = self.limits.get(model, {})
+            budget = ModelBudget(model, limits.get("rpm", self.default_rpm), limits.get("tpm", self.default_tpm))
+            self.budgets[model] = budget
+        return budget
+
+    def snapshot(self):
+        return {model: budget.snapshot() for model, budget in self.budgets.items()}
+
+# 앱 전체에서 공유하는 스케줄러
+rate_limiter = RateLimiter()
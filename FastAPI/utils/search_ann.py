@@ -0,0 +1,156 @@
+# utils/search_ann.py
+import os
+import time
+import logging
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# ANN 설정
+ANN_COMPONENTS = int(os.getenv("SEARCH_ANN_COMPONENTS", "128"))  # SVD 축소 차원
+ANN_LISTS = int(os.getenv("SEARCH_ANN_LISTS", "0"))  # IVF 군집 수 (0 이면 sqrt(N))
+ANN_PROBES = int(os.getenv("SEARCH_ANN_PROBES", "16"))  # 질의 시 탐색할 군집 수
+ANN_CANDIDATES = int(os.getenv("SEARCH_ANN_CANDIDATES", "200"))  # 정밀 재계산할 후보 수
+ANN_MIN_ROWS = int(os.getenv("SEARCH_ANN_MIN_ROWS", "2000"))  # 이보다 작으면 exact 검색 사용
+
+class AnnIndex:
+    """
+    근사 최근접 이웃(ANN) 인덱스 - TruncatedSVD 축소 벡터 + IVF(k-means 군집별 inverted list)
+
+    질의는 가까운 군집 몇 개만 탐색하여 후보 행을 고르고,
+    최종 점수는 원래 TF-IDF 행렬로 다시 계산한다 (후보 선택만 근사).
+
+    스냅샷은 compaction 전까지 행을 뒤에 추가만 하므로, 같은 vectorizer 를 쓰는
+    이후 스냅샷에도 그대로 사용할 수 있다. 인덱스 생성 후 추가된 행(n_rows 이후)은
+    항상 후보에 포함된다.
+    """
+
+    def __init__(self, vectorizer, svd, centroids, lists, vectors, n_rows,
+                 n_probe=ANN_PROBES, n_candidates=ANN_CANDIDATES):
+        self.vectorizer = vectorizer
+        self.svd = svd
+        self.centroids = centroids
+        self.lists = lists
+        self.vectors = vectors
+        self.n_rows = n_rows
+        self.n_probe = n_probe
+        self.n_candidates = n_candidates
+
+    @classmethod
+    def build(cls, snapshot, n_components=ANN_COMPONENTS, n_lists=ANN_LISTS, random_state=42):
+        """스냅샷의 TF-IDF 행렬로 SVD + k-means 인덱스 생성"""
+        start = time.perf_counter()
+        matrix = snapshot.matrix
+        n_rows, n_features = matrix.shape
+
+        n_components = max(1, min(n_components, n_features - 1, n_rows - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        vectors = normalize(svd.fit_transform(matrix)).astype(np.float32)
+
+        n_lists = n_lists or int(np.sqrt(n_rows))
+        n_lists = max(1, min(n_lists, n_rows))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=random_state, n_init=3, batch_size=4096)
+        assignments = kmeans.fit_predict(vectors)
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+        # 군집 번호 -> 소속 행 번호 배열
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        lists = [order[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+
+        logger.info(f"ANN 인덱스 생성 완료: {n_rows}건, {n_components}차원, 군집 {n_lists}개 "
+                    f"({time.perf_counter() - start:.2f}s)")
+        return cls(snapshot.vectorizer, svd, centroids, lists, vectors, n_rows)
+
+    def usable_for(self, snapshot):
+        """같은 vectorizer 로 만든 스냅샷(행 추가만 된 상태)이면 재사용 가능"""
+        return snapshot.vectorizer is self.vectorizer and len(snapshot.ids) >= self.n_rows
+
+    def candidate_rows(self, input_vector, rows):
+        """
+        rows(stack 필터 통과 행) 중 ANN 으로 고른 후보 행만 반환
+        input_vector: vectorizer.transform 결과 (1 x 어휘수 sparse)
+        """
+        query = normalize(self.svd.transform(input_vector)).astype(np.float32).ravel()
+
+        # 가까운 군집 n_probe 개의 행만 근사 점수 계산
+        n_probe = min(self.n_probe, len(self.lists))
+        probes = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        probed = np.concatenate([self.lists[p] for p in probes])
+        allowed = np.zeros(self.n_rows, dtype=bool)
+        allowed[rows[rows < self.n_rows]] = True
+        probed = probed[allowed[probed]]
+
+        if len(probed) > self.n_candidates:
+            approx = self.vectors[probed] @ query
+            probed = probed[np.argpartition(-approx, self.n_candidates - 1)[:self.n_candidates]]
+
+        # ANN 생성 이후 추가된 행은 전부 후보
+        tail = rows[rows >= self.n_rows]
+        return np.union1d(probed, tail)
+
+def benchmark_recall(snapshot, ann, queries, top_k=10, threshold=0.0):
+    """
+    exact 검색 대비 ANN 검색의 recall@k 와 평균 지연시간 측정
+    queries: (input_text, target_stack) 리스트
+    """
+    from utils.search_index import select_top_k
+
+    recalls, exact_times, ann_times = [], [], []
+    for input_text, target_stack in queries:
+        start = time.perf_counter()
+        exact_ids, exact_scores = snapshot.score_candidates(input_text, target_stack)
+        exact_top = set(exact_ids[select_top_k(exact_scores, threshold, top_k)].tolist())
+        exact_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ann_ids, ann_scores = snapshot.score_candidates(input_text, target_stack, ann=ann)
+        ann_top = set(ann_ids[select_top_k(ann_scores, threshold, top_k)].tolist())
+        ann_times.append(time.perf_counter() - start)
+
+        if exact_top:
+            recalls.append(len(exact_top & ann_top) / len(exact_top))
+
+    return {
+        f"recall@{top_k}": float(np.mean(recalls)) if recalls else None,
+        "exact_ms": float(np.mean(exact_times) * 1000),
+        "ann_ms": float(np.mean(ann_times) * 1000),
+        "queries": len(queries)
+    }
+
+# 합성 코퍼스로 recall@k 벤치마크 실행
+if __name__ == "__main__":
+    import sys
+    import json
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.project_corpus import ProjectCorpus, decode_project_info
+    from utils.search_index import IndexSnapshot, preprocess_text
+
+    n_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DB", "project_info_DB.json")
+    with open(db_path, encoding="utf-8") as f:
+        seed = decode_project_info(json.load(f))
+
+    # DB 샘플의 단어/스택으로 n_docs 개의 합성 문서 생성 (주제별 단어 묶음 + 약간의 잡음)
+    rng = np.random.default_rng(0)
+    words = np.array(sorted(set(" ".join(preprocess_text(s) for s in seed.subjects).split())))
+    stacks = sorted({token for stack in seed.stacks for token in stack})
+    topics = [rng.choice(words, size=40, replace=False) for _ in range(100)]
+    subjects = []
+    for _ in range(n_docs):
+        topic = topics[rng.integers(len(topics))]
+        length = rng.integers(8, 30)
+        doc = np.where(rng.random(length) < 0.85, rng.choice(topic, size=length), rng.choice(words, size=length))
+        subjects.append(" ".join(doc))
+    doc_stacks = [tuple(rng.choice(stacks, size=rng.integers(1, 4), replace=False)) for _ in range(n_docs)]
+    corpus = ProjectCorpus(np.arange(n_docs), subjects, doc_stacks)
+
+    snapshot = IndexSnapshot.fit(corpus.ids, [preprocess_text(s) for s in corpus.subjects], corpus.stacks)
+    ann = AnnIndex.build(snapshot)
+
+    queries = [(subjects[i], doc_stacks[i]) for i in rng.choice(n_docs, size=200, replace=False)]
+    print(json.dumps(benchmark_recall(snapshot, ann, queries), indent=2))
@@ -0,0 +1,698 @@
+# utils/search_index.py
+import os
+import re
+import json
+import logging
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.project_corpus import normalize_stack
+from utils.search_ann import AnnIndex, ANN_MIN_ROWS
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 인덱스 저장 경로 (sparse matrix + vocabulary)
+INDEX_DIR = os.getenv(
+    "SEARCH_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DB", "search_index")
+)
+MATRIX_FILE = "tfidf_matrix.npz"
+META_FILE = "index_meta.json"
+# 마지막 전체 저장 이후의 upsert/delete 기록 (append-only, 전체 저장 시 정리)
+JOURNAL_FILE = "index_journal.jsonl"
+
+# 증분 업데이트 후 재학습(compaction) 기준: 변경 건수가 max(최소값, 비율 * 전체 건수) 이상
+COMPACT_MIN_CHANGES = int(os.getenv("SEARCH_INDEX_COMPACT_MIN_CHANGES", "50"))
+COMPACT_RATIO = float(os.getenv("SEARCH_INDEX_COMPACT_RATIO", "0.1"))
+
+# 토큰화 방식: "regex"(기본, 공백 기준 토큰) / "okt"(konlpy 형태소 분석, JVM 필요)
+SEARCH_TOKENIZER = os.getenv("SEARCH_TOKENIZER", "regex").lower()
+# 형태소 분석 결과 LRU 캐시 크기 (문서/질의 텍스트 단위)
+SEARCH_TOKEN_CACHE_SIZE = int(os.getenv("SEARCH_TOKEN_CACHE_SIZE", "20000"))
+# 형태소 분석 시 남길 품사 (조사/어미/구두점 제외)
+MORPH_POS = {"Noun", "Verb", "Adjective", "Alpha", "Number"}
+
+# TfidfVectorizer 설정 (기존 search_subject.py 설정 유지)
+VECTORIZER_PARAMS = {
+    "max_features": 1000,  # 최대 특성 수
+    "ngram_range": (1, 2),  # 1-gram과 2-gram 사용
+    "min_df": 1,  # 최소 문서 빈도
+    "max_df": 0.95,  # 최대 문서 빈도 (너무 자주 나오는 단어 제외)
+    "stop_words": None
+}
+
+# 텍스트 전처리 함수
+def preprocess_text(text):
+    if pd.isna(text):
+        return ""
+    # HTML 태그 제거
+    text = re.sub('<.*?>', '', str(text))
+    # 특수문자 제거 (한글, 영문, 숫자, 공백만 유지)
+    text = re.sub(r'[^가-힣a-zA-Z0-9\s]', ' ', text)
+    # 연속된 공백을 하나로 변환
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+# ===== 형태소 분석 (okt 모드) =====
+
+_okt = None
+_okt_lock = threading.Lock()
+
+def get_okt():
+    """Okt 분석기를 처음 필요할 때 한 번만 생성 (import/JVM 기동 비용을 서버 시작 시 지불하지 않음)"""
+    global _okt
+    if _okt is None:
+        with _okt_lock:
+            if _okt is None:
+                from konlpy.tag import Okt
+                _okt = Okt()
+    return _okt
+
+@lru_cache(maxsize=SEARCH_TOKEN_CACHE_SIZE)
+def morph_tokens(text):
+    """텍스트 -> 형태소 토큰 tuple (같은 텍스트는 캐시에서 반환)"""
+    okt = get_okt()
+    with _okt_lock:
+        pos = okt.pos(text, norm=True, stem=True)
+    return tuple(word for word, tag in pos if tag in MORPH_POS)
+
+def resolve_tokenizer(mode=SEARCH_TOKENIZER):
+    """토큰화 방식 결정 - okt 를 쓸 수 없는 환경이면 regex 로 대체"""
+    if mode != "okt":
+        return "regex"
+    try:
+        get_okt()
+        return "okt"
+    except Exception as e:
+        logger.warning(f"Okt 형태소 분석기를 사용할 수 없어 regex 토큰화로 대체합니다: {e}")
+        return "regex"
+
+def build_vectorizer(vocabulary=None, tokenizer="regex"):
+    """검색 인덱스용 TfidfVectorizer 생성"""
+    if tokenizer == "okt":
+        return TfidfVectorizer(vocabulary=vocabulary, tokenizer=morph_tokens, token_pattern=None, **VECTORIZER_PARAMS)
+    return TfidfVectorizer(vocabulary=vocabulary, **VECTORIZER_PARAMS)
+
+def tokenizer_of(vectorizer):
+    return "okt" if vectorizer.tokenizer is morph_tokens else "regex"
+
+_EMPTY_POSTING = np.empty(0, dtype=np.int64)
+
+def select_top_k(scores, threshold, top_k):
+    """threshold 를 넘는 점수 중 상위 top_k 위치를 내림차순으로 반환 (전체 정렬 없이 argpartition)"""
+    above = np.flatnonzero(scores > threshold)
+    if top_k <= 0 or len(above) == 0:
+        return above[:0]
+    if len(above) > top_k:
+        above = above[np.argpartition(-scores[above], top_k - 1)[:top_k]]
+    return above[np.argsort(-scores[above], kind="stable")]
+
+def build_postings(stacks):
+    """stack 토큰 -> 해당 토큰을 가진 행 번호 배열 (inverted index)"""
+    rows_of_token = {}
+    for row, stack in enumerate(stacks):
+        for token in set(stack):
+            rows_of_token.setdefault(token, []).append(row)
+    return {token: _readonly(np.asarray(rows, dtype=np.int64)) for token, rows in rows_of_token.items()}
+
+def _readonly(array):
+    array.setflags(write=False)
+    return array
+
+class _GrowableArray:
+    """뒤에 추가만 하는 numpy 배열 (용량을 두 배씩 늘려 추가 비용을 상수 시간으로 유지)"""
+
+    def __init__(self, values, dtype):
+        self.array = np.array(values, dtype=dtype)
+        self.size = len(self.array)
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.array):
+            grown = np.empty(max(2 * len(self.array), end, 16), dtype=self.array.dtype)
+            grown[:self.size] = self.array[:self.size]
+            self.array = grown
+        self.array[self.size:end] = values
+        self.size = end
+
+    def head(self, n):
+        """앞의 n 개 읽기 전용 view (복사 없음)"""
+        return _readonly(self.array[:n])
+
+class RowStore:
+    """
+    같은 vectorizer 로 만든 스냅샷들이 공유하는 append-only 행 저장소
+    (CSR 배열 + workspaceId + stack/subject + stack posting list + 행별 삭제 버전)
+
+    행은 뒤에 추가만 하고 이미 쓴 값은 바꾸지 않으므로, 스냅샷은 자신이 만들어질 때의 행 수까지만 읽으면
+    이후의 추가와 무관하게 일관된 상태를 본다. 삭제는 dead_at[row] 에 삭제한 스냅샷 버전을 기록하므로
+    그 이전 버전의 스냅샷에는 계속 살아있는 행으로 보인다.
+    추가는 writer lock 안에서 최신 스냅샷 기준으로만 한다 (SearchIndex 가 보장).
+    """
+
+    def __init__(self, matrix, ids, stacks, subjects, alive=None):
+        """stacks 는 normalize_stack 을 거친 tuple 목록"""
+        matrix = matrix.tocsr()
+        index_dtype = matrix.indptr.dtype
+        self.n_features = matrix.shape[1]
+        self.data = _GrowableArray(matrix.data, matrix.dtype)
+        self.indices = _GrowableArray(matrix.indices, index_dtype)
+        self.indptr = _GrowableArray(matrix.indptr, index_dtype)
+        self.ids = _GrowableArray(ids, np.int64)
+        self.stacks = list(stacks)
+        self.subjects = list(subjects)
+        dead_at = np.full(len(self.subjects), np.inf)
+        if alive is not None:
+            dead_at[~np.asarray(alive, dtype=bool)] = -np.inf
+        self.dead_at = _GrowableArray(dead_at, np.float64)
+        # stack 토큰 -> 해당 토큰을 가진 행 번호 (오름차순)
+        self.postings = {}
+        for token, rows in build_postings(self.stacks).items():
+            self.postings[token] = _GrowableArray(rows, np.int64)
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def append(self, row_matrix, workspace_id, stack, processed_subject):
+        """transform 된 1행을 추가하고 행 번호 반환"""
+        row = len(self.subjects)
+        self.data.extend(row_matrix.data)
+        self.indices.extend(row_matrix.indices)
+        self.indptr.extend([self.indptr.array[self.indptr.size - 1] + row_matrix.nnz])
+        self.ids.extend([workspace_id])
+        self.dead_at.extend([np.inf])
+        for token in set(stack):
+            posting = self.postings.get(token)
+            if posting is None:
+                self.postings[token] = _GrowableArray([row], np.int64)
+            else:
+                posting.extend([row])
+        self.stacks.append(stack)
+        # subjects 길이가 행 수이므로 마지막에 추가 (다른 배열이 모두 채워진 뒤 행이 보이도록)
+        self.subjects.append(processed_subject)
+        return row
+
+    def kill(self, row, version):
+        """version 이후 스냅샷에서 row 를 삭제된 행으로 표시"""
+        self.dead_at.array[row] = version
+
+    def posting(self, token, n_rows):
+        """token 을 가진 행 중 n_rows 미만인 행 번호 (없으면 None)"""
+        posting = self.postings.get(token)
+        if posting is None:
+            return None
+        # size 를 먼저 읽는다 (이후 array 가 늘어난 배열로 바뀌어도 앞부분은 같음)
+        size = posting.size
+        rows = posting.array[:size]
+        return _readonly(rows[:np.searchsorted(rows, n_rows)])
+
+class IndexSnapshot:
+    """
+    한 시점의 검색 인덱스 (vectorizer + 공유 행 저장소 중 앞 n_rows 행 + 버전)
+
+    생성 후에는 절대 변경하지 않는다. 변경이 필요하면 새 스냅샷을 만들어 교체하므로
+    검색 요청은 lock 없이 스냅샷 하나를 잡고 끝까지 일관된 상태로 계산할 수 있다.
+    행 추가/삭제 스냅샷은 저장소를 공유하고 행 수와 버전만 다르므로 기존 행을 복사하지 않는다.
+    (TfidfVectorizer 기본 norm='l2' 이므로 dot product == cosine similarity)
+    """
+
+    def __init__(self, vectorizer, store, n_rows, size, version=1, source_digest=None):
+        self.vectorizer = vectorizer
+        self.store = store
+        self.n_rows = n_rows
+        self.size = size
+        self.version = version
+        # 인덱스를 만든 project-info 원본의 digest (DB 변경 여부 판단용)
+        self.source_digest = source_digest
+        self._matrix = None
+
+    @classmethod
+    def from_rows(cls, vectorizer, matrix, ids, stacks, subjects, alive=None, version=1, source_digest=None):
+        """행 전체로 새 저장소를 만들어 스냅샷 생성 (stacks 는 normalize_stack 을 거친 tuple 목록)"""
+        store = RowStore(matrix, ids, stacks, subjects, alive)
+        size = len(store) if alive is None else int(np.count_nonzero(alive))
+        return cls(vectorizer, store, len(store), size, version=version, source_digest=source_digest)
+
+    @classmethod
+    def fit(cls, ids, processed_subjects, stacks, version=1, source_digest=None):
+        """전처리된 문서 전체로 vectorizer 를 fit 하여 스냅샷 생성"""
+        vectorizer = build_vectorizer(tokenizer=resolve_tokenizer())
+        matrix = vectorizer.fit_transform(processed_subjects)
+        stacks = [normalize_stack(stack) for stack in stacks]
+        return cls.from_rows(vectorizer, matrix, ids, stacks, processed_subjects, version=version, source_digest=source_digest)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def matrix(self):
+        """앞 n_rows 행의 CSR 행렬 (저장소 배열의 view, 복사 없음)"""
+        if self._matrix is None:
+            store, n = self.store, self.n_rows
+            indptr = store.indptr.head(n + 1)
+            nnz = int(indptr[-1])
+            self._matrix = sp.csr_matrix(
+                (store.data.head(nnz), store.indices.head(nnz), indptr),
+                shape=(n, store.n_features)
+            )
+        return self._matrix
+
+    @property
+    def ids(self):
+        return self.store.ids.head(self.n_rows)
+
+    @property
+    def alive(self):
+        return self.store.dead_at.head(self.n_rows) > self.version
+
+    @property
+    def stacks(self):
+        return self.store.stacks[:self.n_rows]
+
+    @property
+    def subjects(self):
+        return self.store.subjects[:self.n_rows]
+
+    def live_rows(self):
+        """workspaceId -> 살아있는 행 번호"""
+        alive = self.alive
+        return {wid: row for row, wid in enumerate(self.ids.tolist()) if alive[row]}
+
+    # ===== 검색 (읽기 전용) =====
+
+    def candidate_rows(self, target_stack):
+        """target_stack 토큰 중 하나라도 가진 살아있는 행 번호 (posting list 합집합)"""
+        postings = [self.store.posting(token, self.n_rows) for token in set(target_stack)]
+        postings = [rows for rows in postings if rows is not None]
+        if not postings:
+            return _EMPTY_POSTING
+        rows = np.unique(np.concatenate(postings))
+        return rows[self.store.dead_at.array[rows] > self.version]
+
+    def score_candidates(self, input_text, target_stack, ann=None):
+        """
+        stack 이 겹치는 후보 행에 대해서만 유사도 계산 -> (workspaceId 배열, 유사도 배열)
+        ann 이 주어지고 후보가 많으면 ANN 으로 후보를 한 번 더 줄인 뒤 정확한 점수 계산
+        """
+        rows = self.candidate_rows(target_stack)
+        input_vector = self.vectorizer.transform([preprocess_text(input_text)])
+        if ann is not None and len(rows) > ann.n_candidates:
+            rows = ann.candidate_rows(input_vector, rows)
+        similarities = (self.matrix[rows] @ input_vector.T).toarray().ravel()
+        return self.ids[rows], similarities
+
+    def score_candidates_batch(self, input_texts, target_stacks, ann=None):
+        """
+        여러 입력을 한 번에 처리 - 입력 전체를 transform 한 뒤 sparse 행렬곱 한 번으로 유사도 계산
+        반환: 입력 순서대로 (후보 workspaceId 배열, 유사도 배열) 리스트
+        """
+        if ann is not None:
+            # ANN 모드는 입력별로 후보만 계산 (전체 행렬곱을 하지 않음)
+            return [self.score_candidates(text, stack, ann=ann) for text, stack in zip(input_texts, target_stacks)]
+
+        input_matrix = self.vectorizer.transform([preprocess_text(text) for text in input_texts])
+        score_matrix = (input_matrix @ self.matrix.T).tocsr()
+
+        results = []
+        for i, target_stack in enumerate(target_stacks):
+            rows = self.candidate_rows(target_stack)
+            similarities = score_matrix[i, rows].toarray().ravel()
+            results.append((self.ids[rows], similarities))
+        return results
+
+    # ===== 변경된 새 스냅샷 생성 =====
+
+    def with_row(self, workspace_id, processed_subject, stack, replace_row=None, version=None):
+        """
+        현재 vocabulary 로 transform 한 행을 저장소 뒤에 추가한 스냅샷 (replace_row 는 삭제 표시)
+        기존 행/posting list 는 복사하지 않으므로 비용은 추가하는 행 하나 분량이다
+        """
+        version = version or self.version + 1
+        size = self.size + 1
+        row = self.store.append(self.vectorizer.transform([processed_subject]), workspace_id, stack, processed_subject)
+        if replace_row is not None:
+            self.store.kill(replace_row, version)
+            size -= 1
+        return IndexSnapshot(self.vectorizer, self.store, row + 1, size, version=version, source_digest=self.source_digest)
+
+    def without_row(self, row, version=None):
+        """해당 행을 삭제 표시한 스냅샷 (저장소 공유)"""
+        version = version or self.version + 1
+        self.store.kill(row, version)
+        return IndexSnapshot(self.vectorizer, self.store, self.n_rows, self.size - 1, version=version, source_digest=self.source_digest)
+
+class SearchIndex:
+    """
+    프로젝트 유사도 검색용 TF-IDF 인덱스
+
+    코퍼스 전체에 대해 한 번만 fit 하고 메모리에 유지한다.
+    검색 시에는 입력 문장 transform + sparse dot product 만 수행한다.
+    기술 스택 필터는 토큰별 posting list 합집합으로 후보 행을 먼저 고르고,
+    유사도는 후보 행에 대해서만 계산한다.
+
+    검색은 항상 `current` 스냅샷(불변) 하나를 잡고 lock 없이 계산한다.
+    upsert/delete/compaction/rebuild 는 writer lock 안에서 새 스냅샷을 만들어
+    `current` 를 한 번에 교체한다 (버전 번호 증가).
+
+    workspace 단위 upsert/delete 는 기존 vocabulary 로 transform 한 행을 공유 저장소 뒤에 추가하고
+    이전 행은 삭제로 표시한다. 변경이 누적되면 백그라운드에서 살아있는 문서로
+    다시 fit(compaction) 하여 새 어휘와 idf 를 반영하고 삭제된 행을 정리한다.
+
+    upsert/delete 는 journal 파일에 한 줄씩 추가만 하고, 전체 저장(npz + json)은
+    compaction / 재생성 때만 한다. 로드 시 저장 버전 이후의 journal 을 다시 적용한다.
+    """
+
+    def __init__(self, snapshot, path=INDEX_DIR):
+        self.current = snapshot
+        self.path = path
+
+        # 아래 상태는 writer lock 안에서만 변경
+        self.write_lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        # workspaceId -> 현재 살아있는 행 번호
+        self.row_of = snapshot.live_rows()
+        # 마지막 fit 이후 upsert/delete 횟수
+        self.pending_changes = 0
+        # 재생성 때마다 증가 (재생성 전에 시작한 compaction 결과를 버리는 기준)
+        self.generation = 0
+        self.compacting = False
+        # 디스크에 마지막으로 저장된 스냅샷 버전
+        self.saved_version = 0
+        # ANN 인덱스 (search_mode="ann" 요청 시 백그라운드에서 생성)
+        self.ann = None
+        self.ann_building = False
+
+    @classmethod
+    def build(cls, corpus, source_digest=None):
+        """read_DB() 결과(ProjectCorpus)로 인덱스 생성"""
+        snapshot = cls._fit_corpus(corpus, version=1, source_digest=source_digest)
+        return cls(snapshot)
+
+    @staticmethod
+    def _fit_corpus(corpus, version, source_digest):
+        processed = [preprocess_text(subject) for subject in corpus.subjects]
+        # stack 은 ProjectCorpus 에서 이미 소문자 토큰 tuple 로 정리됨
+        snapshot = IndexSnapshot.fit(corpus.ids, processed, corpus.stacks, version=version, source_digest=source_digest)
+        logger.info(f"검색 인덱스 생성 완료: {snapshot.matrix.shape[0]}건, 어휘 {snapshot.matrix.shape[1]}개")
+        return snapshot
+
+    def __len__(self):
+        return len(self.current)
+
+    @property
+    def version(self):
+        return self.current.version
+
+    @property
+    def source_digest(self):
+        return self.current.source_digest
+
+    def rebuild(self, corpus, source_digest=None):
+        """DB 전체로 다시 fit 한 스냅샷으로 교체 (fit 동안 검색은 기존 스냅샷 사용)"""
+        snapshot = self._fit_corpus(corpus, version=self.current.version + 1, source_digest=source_digest)
+        with self.write_lock:
+            snapshot.version = max(snapshot.version, self.current.version + 1)
+            self.current = snapshot
+            self.row_of = snapshot.live_rows()
+            self.pending_changes = 0
+            self.generation += 1
+
+    # ===== ANN =====
+
+    def get_ann(self):
+        """
+        현재 스냅샷에 쓸 수 있는 ANN 인덱스 반환
+        없거나 compaction/재생성으로 무효화되었으면 백그라운드 생성을 시작하고 None(exact 검색) 반환
+        """
+        snapshot = self.current
+        ann = self.ann
+        if ann is not None and ann.usable_for(snapshot):
+            return ann
+        if len(snapshot) < ANN_MIN_ROWS:
+            return None
+
+        with self.write_lock:
+            if self.ann_building:
+                return None
+            self.ann_building = True
+
+        threading.Thread(target=self._build_ann_in_background, daemon=True).start()
+        return None
+
+    def _build_ann_in_background(self):
+        try:
+            self.ann = AnnIndex.build(self.current)
+        except Exception as e:
+            logger.error(f"ANN 인덱스 생성 실패: {e}")
+        finally:
+            with self.write_lock:
+                self.ann_building = False
+
+    # ===== 증분 업데이트 =====
+
+    def upsert(self, workspace_id, subject, stack):
+        """workspace 추가/수정 - 기존 vocabulary 로 transform 하여 행 추가 (journal 에 기록)"""
+        processed = preprocess_text(subject)
+        stack = normalize_stack(stack)
+        with self.write_lock:
+            self._append_journal({
+                "version": self.current.version + 1, "op": "upsert",
+                "id": workspace_id, "subject": processed, "stack": list(stack)
+            })
+            self._upsert_locked(workspace_id, processed, stack)
+
+        self.maybe_compact()
+
+    def delete(self, workspace_id):
+        """workspace 삭제 - 행은 남겨두고 삭제 표시 (없으면 False)"""
+        with self.write_lock:
+            if workspace_id not in self.row_of:
+                return False
+            self._append_journal({"version": self.current.version + 1, "op": "delete", "id": workspace_id})
+            self._delete_locked(workspace_id)
+
+        self.maybe_compact()
+        return True
+
+    def _upsert_locked(self, workspace_id, processed, stack, version=None):
+        snapshot = self.current.with_row(workspace_id, processed, stack, replace_row=self.row_of.get(workspace_id), version=version)
+        self.row_of[workspace_id] = snapshot.n_rows - 1
+        self.pending_changes += 1
+        self.current = snapshot
+
+    def _delete_locked(self, workspace_id, version=None):
+        self.current = self.current.without_row(self.row_of.pop(workspace_id), version=version)
+        self.pending_changes += 1
+
+    def needs_compaction(self):
+        threshold = max(COMPACT_MIN_CHANGES, int(COMPACT_RATIO * max(len(self), 1)))
+        return self.pending_changes >= threshold
+
+    def maybe_compact(self):
+        """변경이 임계치를 넘으면 백그라운드 스레드에서 compaction 시작"""
+        with self.write_lock:
+            if self.compacting or not self.needs_compaction():
+                return False
+            self.compacting = True
+
+        threading.Thread(target=self._compact_in_background, daemon=True).start()
+        return True
+
+    def _compact_in_background(self):
+        try:
+            if self.compact():
+                self.save()
+        except Exception as e:
+            logger.error(f"검색 인덱스 compaction 실패: {e}")
+        finally:
+            with self.write_lock:
+                self.compacting = False
+
+    def compact(self):
+        """살아있는 문서로 다시 fit (vocabulary/idf 갱신, 삭제 행 정리), 결과를 버렸으면 False"""
+        # fit 은 lock 밖에서 수행 - 그동안의 검색/변경은 기존 스냅샷으로 계속 처리
+        with self.write_lock:
+            base = self.current
+            base_rows = dict(self.row_of)
+            changes_at_start = self.pending_changes
+            generation = self.generation
+
+        base_ids = list(base_rows.keys())
+        base_subjects, base_stacks = base.subjects, base.stacks
+        fitted = IndexSnapshot.fit(
+            base_ids,
+            [base_subjects[base_rows[wid]] for wid in base_ids],
+            [base_stacks[base_rows[wid]] for wid in base_ids]
+        )
+
+        with self.write_lock:
+            # fit 도중 재생성되었으면 이전 데이터로 만든 결과이므로 버림
+            if self.generation != generation:
+                logger.info("compaction 도중 검색 인덱스가 재생성되어 compaction 결과를 버립니다")
+                return False
+            latest = self.current
+            latest_subjects, latest_stacks = latest.subjects, latest.stacks
+
+            # fit 도중 바뀌지 않은 문서는 fit 결과 행을 그대로 사용
+            keep_rows, keep_ids = [], []
+            for pos, wid in enumerate(base_ids):
+                row = self.row_of.get(wid)
+                if row is not None and latest_subjects[row] == base_subjects[base_rows[wid]]:
+                    keep_rows.append(pos)
+                    keep_ids.append(wid)
+            kept = set(keep_ids)
+            extra_ids = [wid for wid in self.row_of if wid not in kept]
+
+            # fit 도중 추가/수정된 문서는 새 vectorizer 로 transform
+            parts = [fitted.matrix[keep_rows]]
+            if extra_ids:
+                parts.append(fitted.vectorizer.transform([latest_subjects[self.row_of[wid]] for wid in extra_ids]))
+
+            new_ids = keep_ids + extra_ids
+            snapshot = IndexSnapshot.from_rows(
+                fitted.vectorizer,
+                sp.vstack(parts, format="csr"),
+                new_ids,
+                [latest_stacks[self.row_of[wid]] for wid in new_ids],
+                [latest_subjects[self.row_of[wid]] for wid in new_ids],
+                version=latest.version + 1,
+                source_digest=latest.source_digest
+            )
+            self.current = snapshot
+            self.row_of = snapshot.live_rows()
+            self.pending_changes -= changes_at_start
+
+        logger.info(f"검색 인덱스 compaction 완료: {len(new_ids)}건, 어휘 {snapshot.matrix.shape[1]}개")
+        return True
+
+    # ===== 저장/로드 =====
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.path, JOURNAL_FILE)
+
+    def _append_journal(self, entry):
+        """변경 한 건을 journal 에 추가 (writer lock 안에서 호출 - 버전 순서대로 기록)"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _read_journal(self):
+        """journal 항목 목록 (마지막 줄이 쓰다 만 줄이면 버림)"""
+        if not os.path.exists(self.journal_path):
+            return []
+        entries = []
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"검색 인덱스 journal 의 손상된 줄을 건너뜁니다: {line[:80]!r}")
+        return entries
+
+    def _trim_journal(self, version):
+        """전체 저장에 포함된 (version 이하) journal 항목 제거"""
+        with self.write_lock:
+            entries = [entry for entry in self._read_journal() if entry["version"] > version]
+            if not entries:
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                return
+            tmp_journal = self.journal_path + ".tmp"
+            with open(tmp_journal, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+            os.replace(tmp_journal, self.journal_path)
+
+    def save(self, path=None):
+        """sparse matrix(npz) + vocabulary/idf/메타데이터(json)로 전체 저장 (compaction / 재생성 시)"""
+        path = path or self.path
+        snapshot = self.current
+        meta = {
+            "version": snapshot.version,
+            "tokenizer": tokenizer_of(snapshot.vectorizer),
+            "vocabulary": {term: int(col) for term, col in snapshot.vectorizer.vocabulary_.items()},
+            "idf": snapshot.vectorizer.idf_.tolist(),
+            "ids": snapshot.ids.tolist(),
+            "stacks": [list(stack) for stack in snapshot.stacks],
+            "subjects": snapshot.subjects,
+            "alive": snapshot.alive.tolist(),
+            "source_digest": snapshot.source_digest
+        }
+
+        with self.save_lock:
+            # 이미 더 최신 스냅샷이 저장되었으면 건너뜀
+            if self.saved_version >= snapshot.version:
+                return
+            os.makedirs(path, exist_ok=True)
+
+            # 쓰는 도중 종료되어도 기존 파일이 깨지지 않도록 임시 파일 후 교체
+            tmp_matrix = os.path.join(path, "tmp_" + MATRIX_FILE)
+            sp.save_npz(tmp_matrix, snapshot.matrix)
+            tmp_meta = os.path.join(path, META_FILE + ".tmp")
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_matrix, os.path.join(path, MATRIX_FILE))
+            os.replace(tmp_meta, os.path.join(path, META_FILE))
+            self.saved_version = snapshot.version
+            if path == self.path:
+                self._trim_journal(snapshot.version)
+
+        logger.info(f"검색 인덱스 저장 완료: {path} (version {snapshot.version})")
+
+    @classmethod
+    def load(cls, path=INDEX_DIR):
+        """저장된 인덱스 로드 + 이후 journal 적용 (없거나 이전 형식이면 None)"""
+        matrix_path = os.path.join(path, MATRIX_FILE)
+        meta_path = os.path.join(path, META_FILE)
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            return None
+
+        matrix = sp.load_npz(matrix_path)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if "subjects" not in meta:
+            logger.warning("이전 형식의 검색 인덱스입니다. 재생성이 필요합니다")
+            return None
+
+        # 토큰화 방식이 바뀌었으면 vocabulary 가 맞지 않으므로 재생성
+        tokenizer = meta.get("tokenizer", "regex")
+        if tokenizer != resolve_tokenizer():
+            logger.warning(f"저장된 검색 인덱스의 토큰화 방식({tokenizer})이 현재 설정과 달라 재생성이 필요합니다")
+            return None
+
+        # 저장된 vocabulary/idf 로 fit 없이 vectorizer 복원
+        vectorizer = build_vectorizer(vocabulary=meta["vocabulary"], tokenizer=tokenizer)
+        vectorizer.idf_ = np.asarray(meta["idf"], dtype=np.float64)
+
+        snapshot = IndexSnapshot.from_rows(
+            vectorizer, matrix, meta["ids"], [normalize_stack(stack) for stack in meta["stacks"]],
+            meta["subjects"], meta["alive"],
+            version=meta.get("version", 1), source_digest=meta.get("source_digest")
+        )
+        index = cls(snapshot, path=path)
+        index.saved_version = snapshot.version
+
+        # 마지막 전체 저장 이후 변경 다시 적용
+        replayed = 0
+        with index.write_lock:
+            for entry in index._read_journal():
+                if entry["version"] <= snapshot.version:
+                    continue
+                if entry["op"] == "upsert":
+                    index._upsert_locked(entry["id"], entry["subject"], normalize_stack(entry["stack"]), entry["version"])
+                elif entry["id"] in index.row_of:
+                    index._delete_locked(entry["id"], entry["version"])
+                replayed += 1
+        logger.info(f"검색 인덱스 로드 완료: {matrix.shape[0]}건 (version {snapshot.version}, journal {replayed}건 적용)")
+
+        # 적용한 journal 은 전체 저장으로 합쳐 다음 로드 시 다시 적용하지 않음
+        if replayed:
+            index.save()
+        index.maybe_compact()
+        return index
@@ -0,0 +1,41 @@
+# utils/singleflight.py
+import asyncio
+import logging
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합치는 요청 병합기
+
+    - 처음 호출한 쪽이 실제 작업(task)을 시작하고, 진행 중에 들어온 같은 키의 호출은 그 task 를 함께 기다린다
+    - 작업이 끝나면 키를 지우므로 이후 호출은 새로 실행된다 (결과 보관은 캐시의 역할)
+    - 기다리던 요청 하나가 취소되어도 공유 task 는 shield 로 보호되어 다른 요청에 영향을 주지 않는다
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.shared = 0  # 기존 task 에 합류한 호출 수
+
+    async def do(self, key, fn):
+        """fn() 코루틴을 key 당 하나만 실행하고 그 결과(또는 예외)를 모든 호출자에게 반환"""
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+            logger.info(f"진행 중인 동일 요청에 합류 (key={key[:8]})")
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        # 모든 호출자가 취소된 경우에도 예외가 처리되지 않은 채로 남지 않도록 확인
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"공유 요청 실패 (key={key[:8]}): {task.exception()}")
+
+# LLM 호출 공용 병합기 (키는 프롬프트 + 파라미터 해시)
+llm_singleflight = SingleFlight()
@@ -0,0 +1,13 @@
+# utils/sse.py
+import json
+
+# SSE 응답 헤더 (프록시 버퍼링 / 캐시 방지)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+def sse_event(event, data):
+    """Server-Sent Events 형식의 이벤트 문자열 생성 (data 는 JSON 으로 직렬화)"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,280 @@
+# utils/stats_aggregator.py
+import os
+import json
+import logging
+import threading
+import pandas as pd
+
+# 로거 설정
+logger = logging.getLogger(__name__)
+
+# 워크스페이스별 스냅샷 / 저널 저장 경로
+STATS_SNAPSHOT_DIR = os.getenv(
+    "STATS_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DB", "stats_snapshots")
+)
+# 저널에 이만큼 쌓이면 스냅샷으로 합친다 (재시작 시 다시 적용할 최대 항목 수)
+STATS_SNAPSHOT_EVERY = int(os.getenv("STATS_SNAPSHOT_EVERY", "500"))
+
+DELETE_EVENT = "DELETE_PROJECT_PROGRESS_ACTION"
+DONE_STATE = "DONE"
+NS_PER_HOUR = 3600 * 10**9
+
+def _to_ns(value):
+    """ISO 문자열 / epoch 값을 UTC 기준 ns 정수로 변환 (시간대가 없으면 UTC 로 간주), 실패하면 None"""
+    if value is None:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    if ts is pd.NaT:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+def parse_event(raw):
+    """
+    user_log 이벤트 1건을 (workspaceId, actionId, 상태 entry) 로 변환, 필수 값이 없으면 None
+    entry 는 해당 액션의 최신 상태로 통계에 필요한 값만 담는다
+    """
+    details = raw.get("details") or {}
+    workspace_id = raw.get("workspaceId")
+    action_id = details.get("actionId")
+    ts = _to_ns(raw.get("timestamp"))
+    if workspace_id is None or action_id is None or ts is None:
+        return None
+    try:
+        user_id = int(raw.get("userId"))
+    except (TypeError, ValueError):
+        return None
+
+    participants = []
+    for participant in details.get("participants") or []:
+        if isinstance(participant, dict) and participant.get("userId") is not None:
+            participants.append(int(participant["userId"]))
+
+    return int(workspace_id), action_id, {
+        "ts": ts,
+        "event": raw.get("event"),
+        "userId": user_id,
+        "participants": list(dict.fromkeys(participants)),
+        "state": details.get("state"),
+        "importance": details.get("importance"),
+        "start": _to_ns(details.get("startDate"))
+    }
+
+class WorkspaceStats:
+    """
+    워크스페이스 하나의 대시보드 통계를 이벤트 단위로 갱신하는 집계기
+
+    /stats/generate 전체 재계산과 같은 기준으로 집계한다
+    - actionId 별 최신 이벤트만 사용 (더 오래된 이벤트는 무시)
+    - 최신 이벤트가 DELETE 이거나 참여자가 없는 액션은 제외
+    - 통계 1: (사용자, state, importance) 별 액션 수 - 발생자 + 참여자, 액션당 사용자 1번
+    - 통계 2: DONE 액션의 (최신 이벤트 시각 - startDate) 평균 - 참여자 / 발생자 별
+    액션의 최신 상태가 바뀌면 이전 상태의 기여분을 빼고 새 상태를 더하므로 갱신 비용은 이벤트 1건 분량이다
+    """
+
+    def __init__(self, workspace_id):
+        self.workspace_id = workspace_id
+        self.actions = {}  # actionId -> 최신 상태 entry
+        self.task_counts = {}  # (userId, state, importance) -> 액션 수
+        self.participant_durations = {}  # (userId, importance) -> [소요 시간 합(ns), 액션 수]
+        self.initiator_durations = {}
+        self.journal_size = 0  # 마지막 스냅샷 이후 저널 항목 수
+        self._dashboard = None
+
+    def apply(self, action_id, entry):
+        """entry 가 해당 액션의 최신 상태면 반영하고 True (같은 entry 를 다시 적용해도 결과는 같음)"""
+        current = self.actions.get(action_id)
+        if current is not None:
+            if current["ts"] > entry["ts"]:
+                return False
+            self._contribute(current, -1)
+        self.actions[action_id] = entry
+        self._contribute(entry, 1)
+        self._dashboard = None
+        return True
+
+    def _contribute(self, entry, sign):
+        if entry["event"] == DELETE_EVENT or not entry["participants"]:
+            return
+        state, importance = entry["state"], entry["importance"]
+        if state is None or importance is None:
+            return
+
+        for user_id in dict.fromkeys([entry["userId"], *entry["participants"]]):
+            _add(self.task_counts, (user_id, state, importance), sign)
+
+        if state != DONE_STATE or entry["start"] is None:
+            return
+        duration = entry["ts"] - entry["start"]
+        if duration < 0:
+            return
+        for user_id in entry["participants"]:
+            _add_duration(self.participant_durations, (user_id, importance), duration, sign)
+        _add_duration(self.initiator_durations, (entry["userId"], importance), duration, sign)
+
+    def dashboard(self):
+        """DashboardResponse 형식의 현재 통계 (다음 변경 전까지 같은 dict 재사용)"""
+        if self._dashboard is None:
+            task_imbalance = [
+                {"userId": user_id, "details.state": state, "details.importance": importance, "count": count}
+                for (user_id, state, importance), count in sorted(self.task_counts.items())
+            ]
+            processing_time = [
+                {"userId": user_id, "details.importance": importance, "mean_hours": total / count / NS_PER_HOUR}
+                for durations in (self.participant_durations, self.initiator_durations)
+                for (user_id, importance), (total, count) in sorted(durations.items())
+            ]
+            self._dashboard = {
+                "task_imbalance": {"data": task_imbalance},
+                "processing_time": {"data": processing_time}
+            }
+        return self._dashboard
+
+    def to_snapshot(self):
+        return {
+            "workspace_id": self.workspace_id,
+            "actions": [[action_id, entry] for action_id, entry in self.actions.items()],
+            "task_counts": [[*key, count] for key, count in self.task_counts.items()],
+            "participant_durations": [[*key, *value] for key, value in self.participant_durations.items()],
+            "initiator_durations": [[*key, *value] for key, value in self.initiator_durations.items()]
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        stats = cls(snapshot["workspace_id"])
+        stats.actions = {action_id: entry for action_id, entry in snapshot["actions"]}
+        stats.task_counts = {(user_id, state, importance): count for user_id, state, importance, count in snapshot["task_counts"]}
+        stats.participant_durations = {(user_id, importance): [total, count] for user_id, importance, total, count in snapshot["participant_durations"]}
+        stats.initiator_durations = {(user_id, importance): [total, count] for user_id, importance, total, count in snapshot["initiator_durations"]}
+        return stats
+
+def _add(counts, key, sign):
+    count = counts.get(key, 0) + sign
+    if count:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+def _add_duration(durations, key, duration, sign):
+    total, count = durations.get(key, (0, 0))
+    total, count = total + sign * duration, count + sign
+    if count:
+        durations[key] = [total, count]
+    else:
+        durations.pop(key, None)
+
+class StatsAggregator:
+    """
+    워크스페이스별 WorkspaceStats 관리 + 디스크 저장
+
+    - 반영된 이벤트는 워크스페이스 저널(jsonl) 에 추가하고, STATS_SNAPSHOT_EVERY 건마다 스냅샷으로 합친다
+    - 처음 조회하는 워크스페이스는 스냅샷 + 저널에서 복원하므로 재시작 후 전체 로그를 다시 보낼 필요가 없다
+    """
+
+    def __init__(self, snapshot_dir=STATS_SNAPSHOT_DIR, snapshot_every=STATS_SNAPSHOT_EVERY):
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_every = snapshot_every
+        self.workspaces = {}
+        self.lock = threading.Lock()
+
+    def ingest(self, events):
+        """이벤트 목록 반영 후 (반영 수, 무시한 수(형식 오류 / 이미 더 최신 상태), 변경된 워크스페이스 목록) 반환"""
+        applied = {}
+        ignored = 0
+        with self.lock:
+            for raw in events:
+                parsed = parse_event(raw)
+                if parsed is None:
+                    ignored += 1
+                    continue
+                workspace_id, action_id, entry = parsed
+                if self._workspace(workspace_id).apply(action_id, entry):
+                    applied.setdefault(workspace_id, []).append([action_id, entry])
+                else:
+                    ignored += 1
+
+            for workspace_id, entries in applied.items():
+                self._persist(self.workspaces[workspace_id], entries)
+
+        return sum(len(entries) for entries in applied.values()), ignored, sorted(applied)
+
+    def dashboard(self, workspace_id):
+        """현재 대시보드 통계, 이벤트를 받은 적 없는 워크스페이스면 None"""
+        with self.lock:
+            stats = self.workspaces.get(workspace_id) or self._load(workspace_id)
+            if not stats.actions:
+                return None
+            self.workspaces[workspace_id] = stats
+            return stats.dashboard()
+
+    def flush(self):
+        """저널이 남아 있는 워크스페이스를 모두 스냅샷으로 저장 (종료 시 호출)"""
+        with self.lock:
+            for stats in self.workspaces.values():
+                if not stats.journal_size:
+                    continue
+                try:
+                    self._write_snapshot(stats)
+                except OSError as e:
+                    logger.error(f"워크스페이스 {stats.workspace_id} 스냅샷 저장 실패: {e}")
+
+    def _workspace(self, workspace_id):
+        stats = self.workspaces.get(workspace_id)
+        if stats is None:
+            stats = self._load(workspace_id)
+            self.workspaces[workspace_id] = stats
+        return stats
+
+    def _paths(self, workspace_id):
+        base = os.path.join(self.snapshot_dir, f"workspace_{workspace_id}")
+        return base + ".json", base + ".journal.jsonl"
+
+    def _load(self, workspace_id):
+        snapshot_path, journal_path = self._paths(workspace_id)
+        stats = WorkspaceStats(workspace_id)
+        try:
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, "r", encoding="utf-8") as f:
+                    stats = WorkspaceStats.from_snapshot(json.load(f))
+            # 스냅샷 이후 반영된 항목 (스냅샷에 이미 포함된 항목을 다시 적용해도 결과는 같음)
+            if os.path.exists(journal_path):
+                with open(journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            action_id, entry = json.loads(line)
+                            stats.apply(action_id, entry)
+                            stats.journal_size += 1
+        except (OSError, ValueError) as e:
+            logger.error(f"워크스페이스 {workspace_id} 통계 복원 실패: {e}")
+        return stats
+
+    def _persist(self, stats, entries):
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            _, journal_path = self._paths(stats.workspace_id)
+            with open(journal_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in entries)
+            stats.journal_size += len(entries)
+            if stats.journal_size >= self.snapshot_every:
+                self._write_snapshot(stats)
+        except OSError as e:
+            logger.error(f"워크스페이스 {stats.workspace_id} 통계 저장 실패: {e}")
+
+    def _write_snapshot(self, stats):
+        snapshot_path, journal_path = self._paths(stats.workspace_id)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stats.to_snapshot(), f, ensure_ascii=False)
+        os.replace(tmp_path, snapshot_path)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        stats.journal_size = 0
+
+# 앱 전체에서 공유하는 집계기
+stats_aggregator = StatsAggregator()
@@ -0,0 +1,146 @@
+# utils/stats_ingest.py
+import json
+import zlib
+import pandas as pd
+
+try:
+    import orjson
+    _fast_loads = orjson.loads
+except ImportError:  # orjson 미설치 환경은 표준 json 사용
+    _fast_loads = json.loads
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# 통계 계산에 쓰는 컬럼 (pd.json_normalize 결과와 같은 이름)
+DETAIL_COLUMNS = ("actionId", "name", "state", "importance", "startDate", "endDate", "participants")
+COLUMNS = ("event", "userId", "timestamp", "workspaceId", *(f"details.{key}" for key in DETAIL_COLUMNS))
+
+class NDJSONDecodeError(ValueError):
+    """NDJSON 한 줄이 JSON 객체가 아니거나 이벤트 형식이 잘못됨 (몇 번째 줄인지 함께 전달)"""
+
+    def __init__(self, line_no, error):
+        super().__init__(f"{line_no}번째 줄 오류: {error}")
+        self.line_no = line_no
+
+def _gunzip():
+    """gzip 스트림 조각을 푸는 (feed, flush) 함수 쌍 (여러 member 가 이어 붙은 파일도 처리)"""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def feed(chunk):
+        nonlocal decompressor
+        out = [decompressor.decompress(chunk)]
+        while decompressor.unused_data:
+            rest = decompressor.unused_data
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            out.append(decompressor.decompress(rest))
+        return b"".join(out)
+
+    def flush():
+        return decompressor.flush()
+
+    return feed, flush
+
+async def iter_ndjson(chunks, gzipped=None):
+    """
+    바이트 조각 async iterator (request.stream() 등) 를 받아 NDJSON 한 줄씩 (줄 번호, dict) 로 반환
+    gzipped=None 이면 첫 조각의 gzip 헤더로 판단한다. 빈 줄은 건너뛴다
+    전체 본문을 모아 두지 않으므로 메모리는 조각 하나 + 끊긴 마지막 줄 분량만 사용
+    """
+    feed = flush = None
+    pending = b""
+    line_no = 0
+
+    def parse(lines):
+        nonlocal line_no
+        for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                value = _fast_loads(line)
+            except ValueError as e:
+                raise NDJSONDecodeError(line_no, f"JSON 파싱 오류: {e}") from e
+            if not isinstance(value, dict):
+                raise NDJSONDecodeError(line_no, "JSON 객체가 아닙니다")
+            yield line_no, value
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if feed is None:
+            if gzipped is None:
+                gzipped = chunk[:2] == GZIP_MAGIC
+            feed, flush = _gunzip() if gzipped else (lambda data: data, lambda: b"")
+        *lines, pending = (pending + feed(chunk)).split(b"\n")
+        for item in parse(lines):
+            yield item
+
+    if flush is not None:
+        pending += flush()
+    for item in parse(pending.split(b"\n")):
+        yield item
+
+class LatestActionColumns:
+    """
+    이벤트를 한 건씩 받아 (workspaceId, actionId) 별 최신 이벤트만 컬럼 값으로 보관
+    /stats/generate 의 json_normalize + 최신 이벤트 선택과 같은 결과 DataFrame 을 만든다
+    (같은 액션의 이전 이벤트는 바로 버리므로 메모리는 액션 수에 비례)
+    timestamp 는 UTC pd.Timestamp 로 바꿔 비교하므로 문자열 / 숫자, 시간대 유무가 섞여 있어도 된다
+    """
+
+    def __init__(self):
+        self.rows = {}  # (workspaceId, actionId) -> 컬럼 값 tuple
+
+    def add(self, event, line_no=None):
+        """이벤트 1건 반영, workspaceId / details.actionId 가 없거나 timestamp 를 해석할 수 없으면 NDJSONDecodeError"""
+        details = event.get("details")
+        if not isinstance(details, dict):
+            details = {}
+        key = (event.get("workspaceId"), details.get("actionId"))
+        if key[0] is None or key[1] is None:
+            raise NDJSONDecodeError(line_no, "workspaceId 와 details.actionId 가 필요합니다")
+        timestamp = _to_utc(event.get("timestamp"), line_no)
+
+        current = self.rows.get(key)
+        if current is not None and not _is_later(timestamp, current[2]):
+            return
+        self.rows[key] = (
+            event.get("event"),
+            event.get("userId"),
+            timestamp,
+            event.get("workspaceId"),
+            *(details.get(name) for name in DETAIL_COLUMNS)
+        )
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_frame(self):
+        """최신 이벤트 DataFrame (컬럼별 리스트로 한 번에 생성), timestamp 내림차순"""
+        rows = sorted(self.rows.values(), key=lambda row: _sort_key(row[2]), reverse=True)
+        columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        return pd.DataFrame({name: list(values) for name, values in zip(COLUMNS, columns)})
+
+def _to_utc(value, line_no):
+    """timestamp 값을 UTC pd.Timestamp 로 변환 (시간대가 없으면 UTC 로 간주, 없으면 None)"""
+    if value is None:
+        return None
+    try:
+        # pd.to_datetime(utc=True) 와 같은 결과, 스칼라 1건은 pd.Timestamp 가 훨씬 빠름
+        timestamp = pd.Timestamp(value)
+    except (ValueError, TypeError, OverflowError) as e:
+        raise NDJSONDecodeError(line_no, f"timestamp 형식 오류: {value!r}") from e
+    if timestamp is pd.NaT:
+        return None
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+def _sort_key(timestamp):
+    # timestamp 가 없는 이벤트는 가장 오래된 것으로 취급
+    return (timestamp is not None, timestamp.value if timestamp is not None else 0)
+
+def _is_later(timestamp, current):
+    if current is None:
+        return timestamp is not None
+    if timestamp is None:
+        return False
+    return timestamp > current